@@ -0,0 +1,98 @@
+"""
+Javbus.parse_html 基准测试
+
+用 fixtures 中保存的 JavBus 风格页面，对比旧版解析器（逐字段对整页做约 15 次正则扫描）
+与当前解析器（预编译模式 + 单次扫描正文）的每秒解析页数，并检查两者结果一致
+
+    python benchmarks/bench_parser.py [-n 每个页面的解析次数]
+"""
+import argparse
+import re
+import sys
+import time
+
+from common import Fixture, init_plugin, load_fixtures
+
+
+def legacy_parse_html(domain: str, source: str, avid: str, html: str) -> dict:
+    """优化前的 Javbus.parse_html，仅用于对比"""
+    scrape_data = {
+        'avid': avid.upper(), 'title': '', 'source': source, 'release_date': '', 'duration': '',
+        'producer': '', 'publisher': '', 'series': '', 'category': '', 'actors': '', 'image_url': ''
+    }
+    meta_match = re.search(r'<meta\s+name="description"\s+content="([^"]+)"', html)
+    if meta_match:
+        desc = meta_match.group(1)
+        date_match = re.search(r'【發行日期】(\d{4}-\d{2}-\d{2})', desc)
+        if date_match:
+            scrape_data['release_date'] = date_match.group(1)
+        duration_match = re.search(r'【長度】(\d+)分鐘', desc)
+        if duration_match:
+            scrape_data['duration'] = duration_match.group(1) + "分钟"
+        title_match = re.search(rf'\({avid}\)(.+?)$', desc)
+        if title_match:
+            scrape_data['title'] = title_match.group(1).strip()
+    if not scrape_data['release_date']:
+        release_match = re.search(r'<span class="header">發行日期:</span>\s*(\d{4}-\d{2}-\d{2})', html)
+        if release_match:
+            scrape_data['release_date'] = release_match.group(1)
+    if not scrape_data['duration']:
+        duration_match = re.search(r'<span class="header">長度:</span>\s*(\d+)分鐘', html)
+        if duration_match:
+            scrape_data['duration'] = duration_match.group(1) + "分钟"
+    title_tag_match = re.search(r'<title>([^<]+)</title>', html)
+    if title_tag_match:
+        title = title_tag_match.group(1)
+        title = re.sub(r'\s*[-|]\s*JavBus.*$', '', title, flags=re.IGNORECASE)
+        title = re.sub(rf'^{avid}\s*', '', title, flags=re.IGNORECASE)
+        scrape_data['title'] = title.strip()
+    for key, header in (('producer', '製作商'), ('publisher', '發行商'), ('series', '系列'), ('director', '導演')):
+        match = re.search(rf'<span class="header">{header}:</span>\s*<a[^>]*>([^<]+)</a>', html)
+        if match:
+            scrape_data[key] = match.group(1).strip()
+    category_matches = re.findall(r'<span class="genre"><label><input[^>]*><a[^>]*>([^<]+)</a></label></span>', html)
+    if category_matches:
+        scrape_data['category'] = ', '.join(
+            cat for cat in category_matches if cat not in ['フルハイビジョン(FHD)', 'MGSだけのおまけ映像付き'])
+    actor_matches = re.findall(r'<a class="avatar-box"[^>]*>\s*<div[^>]*>\s*'
+                               r'<img[^>]*>\s*</div>\s*<span>([^<]+)</span>', html)
+    if actor_matches:
+        scrape_data['actors'] = ', '.join(actor_matches)
+    image_match = re.search(r'<a class="bigImage"[^>]*href="([^"]+)"', html)
+    if image_match:
+        scrape_data['image_url'] = f"https://{domain}{image_match.group(1)}"
+    return scrape_data
+
+
+def pages_per_second(parse, pages: list[Fixture], rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for page in pages:
+            parse(page.avid, page.html)
+    return rounds * len(pages) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--rounds", type=int, default=2000, help="每个页面的解析次数")
+    args = parser.parse_args()
+
+    scraper = init_plugin().Javbus()
+    pages = load_fixtures()
+    for page in pages:
+        expected = legacy_parse_html(scraper.get_domain(), scraper.get_scraper_name(), page.avid, page.html)
+        if scraper.parse_html(page.avid, page.html) != expected:
+            print(f"{page.avid}: 解析结果与旧版不一致")
+            sys.exit(1)
+
+    before = pages_per_second(
+        lambda avid, html: legacy_parse_html(scraper.get_domain(), scraper.get_scraper_name(), avid, html),
+        pages, args.rounds)
+    after = pages_per_second(scraper.parse_html, pages, args.rounds)
+    print(f"页面数: {len(pages)}，每页解析 {args.rounds} 次")
+    print(f"旧版: {before:10.0f} 页/秒")
+    print(f"当前: {after:10.0f} 页/秒（{after / before:.2f}x）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+基准测试公用工具：读取 fixtures、初始化 NoneBot、离线替身会话
+"""
+import json
+from contextlib import asynccontextmanager
+from http.cookiejar import Cookie, CookieJar
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlsplit
+
+import nonebot
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+EXPECTED_FILE = FIXTURES_DIR / "expected.json"
+
+
+class Fixture:
+    """一个保存下来的详情页：fixtures/<站点>_<AVID>.html"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.site, self.avid = path.stem.split("_", 1)
+        self.html = path.read_text(encoding="utf-8")
+
+
+def load_fixtures() -> list[Fixture]:
+    return [Fixture(path) for path in sorted(FIXTURES_DIR.glob("*.html"))]
+
+
+def load_expected() -> dict[str, dict]:
+    """fixture 文件名 -> 期望解析出的字段"""
+    return json.loads(EXPECTED_FILE.read_text(encoding="utf-8"))
+
+
+def init_plugin():
+    """初始化 NoneBot 并加载插件，返回 scraper 子包"""
+    nonebot.init()
+    nonebot.require("nonebot_plugin_flo_jav")
+    from nonebot_plugin_flo_jav import scraper
+    return scraper
+
+
+class FakeResponse:
+    def __init__(self, url: str, status_code: int, content: bytes):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers: dict[str, str] = {}
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8")
+
+    async def aiter_content(self, chunk_size: int = 16 * 1024):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}: {self.url}")
+
+
+class FakeSession:
+    """
+    替代 curl_cffi.AsyncSession 的离线会话
+    按 URL 路径返回 fixtures 中的页面，其他路径返回 404，图片请求返回一个最小的 JPEG
+    """
+    JPEG = b"\xff\xd8\xff\xe0" + b"\x00" * 64 + b"\xff\xd9"
+
+    def __init__(self, pages: dict[str, str]):
+        """:param pages: URL 路径（如 /ABF-296）-> HTML"""
+        self.pages = pages
+        self.requests: list[str] = []
+
+    async def get(self, url: str, headers: Optional[dict] = None, **kwargs) -> FakeResponse:
+        self.requests.append(url)
+        path = urlsplit(url).path
+        if path in self.pages:
+            return FakeResponse(url, 200, self.pages[path].encode("utf-8"))
+        if path.startswith("/pics/"):
+            return FakeResponse(url, 200, self.JPEG)
+        return FakeResponse(url, 404, b"")
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs):
+        yield await self.get(url, **kwargs)
+
+    async def close(self):
+        pass
+
+
+class FakeCookies:
+    """替代 curl_cffi.Cookies 的 Cookie 容器，同样通过 jar 暴露 CookieJar"""
+
+    def __init__(self):
+        self.jar = CookieJar()
+
+    def set(self, name: str, value: str, domain: str = "", path: str = "/"):
+        self.jar.set_cookie(Cookie(0, name, value, None, False, domain, bool(domain), domain.startswith("."),
+                                   path, bool(path), False, None, True, None, None, {}))
+
+
+class CookieSession(FakeSession):
+    """带 Cookie 的离线会话：访问首页 / 时下发 front_cookies"""
+
+    def __init__(self, pages: dict[str, str], front_cookies: dict[str, str]):
+        super().__init__(pages)
+        self.front_cookies = front_cookies
+        self.cookies = FakeCookies()
+
+    async def get(self, url: str, headers: Optional[dict] = None, **kwargs) -> FakeResponse:
+        if urlsplit(url).path == "/":
+            self.requests.append(url)
+            for name, value in self.front_cookies.items():
+                self.cookies.set(name, value)
+            return FakeResponse(url, 200, b"")
+        return await super().get(url, headers, **kwargs)
@@ -0,0 +1,181 @@
+"""
+离线回放回归测试
+
+把 fixtures 中保存的 JavBus / Busdmm / Dmmsee 页面回放给各刮削器，不访问网络：
+- 准确率：parse_html 与 ScraperBase.scrape（经由替身会话）逐字段对比 fixtures/expected.json
+- 吞吐：parse_html 与 scrape 每秒处理的页面数
+- 内存：每次解析的峰值内存与结果占用的内存块数（tracemalloc）
+- Cookie：过期的 Cookie 刷新后（即使镜像下发的 Cookie 没有变化）不再重复访问首页
+
+任何字段不一致，或吞吐低于 baseline.json 中记录值的 (1 - tolerance) 时以非 0 状态退出
+
+    python benchmarks/replay.py [-n 轮数] [--tolerance 0.2] [--save-baseline]
+"""
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from common import CookieSession, FakeSession, Fixture, init_plugin, load_expected, load_fixtures
+
+BASELINE_FILE = Path(__file__).parent / "baseline.json"
+FIELDS = ["avid", "title", "source", "release_date", "duration", "producer",
+          "publisher", "series", "category", "actors", "image_url"]
+
+
+def make_scraper(scraper_pkg, fixture: Fixture):
+    return scraper_pkg.ScraperManager.SCRAPER_CLASSES[fixture.site]()
+
+
+def compare(name: str, actual: dict, expected: dict, hits: dict[str, int], failures: list[str]):
+    for field in FIELDS:
+        if actual.get(field, "") == expected.get(field, ""):
+            hits[field] += 1
+        else:
+            failures.append(f"{name}.{field}: 期望 {expected.get(field)!r}，实际 {actual.get(field)!r}")
+
+
+def check_parse(scraper_pkg, fixtures: list[Fixture], expected: dict[str, dict],
+                hits: dict[str, int], failures: list[str]):
+    for fixture in fixtures:
+        result = make_scraper(scraper_pkg, fixture).parse_html(fixture.avid, fixture.html) or {}
+        compare(f"parse:{fixture.path.name}", result, expected[fixture.path.name], hits, failures)
+
+
+async def check_scrape(scraper_pkg, fixtures: list[Fixture], expected: dict[str, dict],
+                       hits: dict[str, int], failures: list[str]):
+    with tempfile.TemporaryDirectory() as image_dir:
+        for fixture in fixtures:
+            name = f"scrape:{fixture.path.name}"
+            scraper = make_scraper(scraper_pkg, fixture)
+            scraper.set_session(FakeSession({f"/{fixture.avid}": fixture.html}))
+            info = await scraper.scrape(fixture.avid)
+            if info is None:
+                failures.append(f"{name}: scrape 返回 None")
+                continue
+            compare(name, {field: getattr(info, f"get_{field}")() for field in FIELDS},
+                    expected[fixture.path.name], hits, failures)
+            if not await scraper.download_image(info.get_image_url(), Path(image_dir) / fixture.avid):
+                failures.append(f"{name}: 封面下载失败")
+            try:
+                await scraper.scrape("NOTEXIST-000")
+                failures.append(f"{name}: 不存在的番号没有抛出 NotFoundError")
+            except scraper_pkg.NotFoundError:
+                pass
+
+
+async def check_cookies(scraper_pkg, fixture: Fixture, failures: list[str]):
+    """
+    保存的 Cookie 已超过 max_age：第一次请求前刷新一次，镜像下发相同的 Cookie，
+    之后的请求不应再访问首页（Cookie 保存在名为 replay 的来源下，不影响各镜像的真实 Cookie）
+    """
+    from nonebot_plugin_flo_jav.model import SourceCookie
+    from nonebot_plugin_flo_jav.repository.CookieRepo import cookie_repo
+    from nonebot_plugin_flo_jav.scraper.SessionCookies import SessionCookies
+
+    stored = json.dumps([["age", "verified", "", "/", None]])
+    await cookie_repo.create_or_update_source_cookie_async(
+        SourceCookie.generate_from_db(("replay", stored, "2000-01-01 00:00:00")))
+    scraper = make_scraper(scraper_pkg, fixture)
+    scraper.cookies = SessionCookies("replay", 3600)
+    session = CookieSession({f"/{fixture.avid}": fixture.html}, {"age": "verified"})
+    scraper.set_session(session)
+    for _ in range(2):
+        await scraper.get_html(fixture.avid)
+    front = sum(urlsplit(url).path == "/" for url in session.requests)
+    if front != 1:
+        failures.append(f"cookie: 两次请求访问了 {front} 次首页，期望 1 次")
+
+
+def parse_throughput(scraper_pkg, fixtures: list[Fixture], rounds: int) -> float:
+    scrapers = [(make_scraper(scraper_pkg, fixture), fixture) for fixture in fixtures]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for scraper, fixture in scrapers:
+            scraper.parse_html(fixture.avid, fixture.html)
+    return rounds * len(fixtures) / (time.perf_counter() - start)
+
+
+async def scrape_throughput(scraper_pkg, fixtures: list[Fixture], rounds: int) -> float:
+    scrapers = []
+    for fixture in fixtures:
+        scraper = make_scraper(scraper_pkg, fixture)
+        scraper.set_session(FakeSession({f"/{fixture.avid}": fixture.html}))
+        scrapers.append((scraper, fixture))
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for scraper, fixture in scrapers:
+            await scraper.scrape(fixture.avid)
+    return rounds * len(fixtures) / (time.perf_counter() - start)
+
+
+def parse_allocations(scraper_pkg, fixtures: list[Fixture]) -> tuple[float, float]:
+    """:return: (每次解析的平均峰值内存 KiB, 结果平均占用的内存块数)"""
+    peaks, blocks = [], []
+    for fixture in fixtures:
+        scraper = make_scraper(scraper_pkg, fixture)
+        scraper.parse_html(fixture.avid, fixture.html)
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        result = scraper.parse_html(fixture.avid, fixture.html)
+        after = tracemalloc.take_snapshot()
+        peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+        tracemalloc.stop()
+        blocks.append(sum(stat.count_diff for stat in after.compare_to(before, "filename")))
+        del result
+    return sum(peaks) / len(peaks), sum(blocks) / len(blocks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--rounds", type=int, default=500, help="吞吐测试的轮数")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许低于基线吞吐的比例")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次吞吐写入 baseline.json")
+    args = parser.parse_args()
+
+    scraper_pkg = init_plugin()
+    fixtures = load_fixtures()
+    expected = load_expected()
+    failures: list[str] = []
+
+    parse_hits = dict.fromkeys(FIELDS, 0)
+    scrape_hits = dict.fromkeys(FIELDS, 0)
+    check_parse(scraper_pkg, fixtures, expected, parse_hits, failures)
+    asyncio.run(check_scrape(scraper_pkg, fixtures, expected, scrape_hits, failures))
+    asyncio.run(check_cookies(scraper_pkg, fixtures[0], failures))
+
+    print(f"页面数: {len(fixtures)}")
+    print(f"{'字段':<14}{'parse':>8}{'scrape':>8}")
+    for field in FIELDS:
+        print(f"{field:<14}{parse_hits[field] / len(fixtures):>8.0%}{scrape_hits[field] / len(fixtures):>8.0%}")
+
+    results = {
+        "parse_pages_per_second": parse_throughput(scraper_pkg, fixtures, args.rounds),
+        "scrape_pages_per_second": asyncio.run(scrape_throughput(scraper_pkg, fixtures, args.rounds)),
+    }
+    peak_kib, blocks = parse_allocations(scraper_pkg, fixtures)
+    print(f"parse 吞吐:  {results['parse_pages_per_second']:10.0f} 页/秒")
+    print(f"scrape 吞吐: {results['scrape_pages_per_second']:10.0f} 页/秒")
+    print(f"parse 峰值内存: {peak_kib:.1f} KiB/页，结果占用 {blocks:.0f} 个内存块")
+
+    if args.save_baseline:
+        BASELINE_FILE.write_text(json.dumps(results, indent=4), encoding="utf-8")
+        print(f"基线已写入 {BASELINE_FILE.name}")
+    elif BASELINE_FILE.exists():
+        baseline = json.loads(BASELINE_FILE.read_text(encoding="utf-8"))
+        for key, value in baseline.items():
+            if results.get(key, 0) < value * (1 - args.tolerance):
+                failures.append(f"{key}: {results.get(key, 0):.0f} 低于基线 {value:.0f}")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
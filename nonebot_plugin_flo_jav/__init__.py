@@ -1,8 +1,10 @@
-import random
-import time
+import re
+from typing import Optional
 
-from nonebot import require
+from nonebot import get_driver, require
+from nonebot.drivers import ASGIMixin, HTTPServerSetup, Request, Response, URL
 from nonebot.log import logger
+from nonebot.permission import SUPERUSER
 
 from .model import AVInfo
 
@@ -13,15 +15,24 @@ require("nonebot_plugin_uninfo")
 from nonebot_plugin_uninfo import *
 
 from .scraper.ScraperManager import scraper_manager
+from .scraper import Prefetcher
+from .cache import Thumbnailer
+from .repository import RepoBase
+from .utils import BackgroundJobs, metrics
 
-from .config import Config
-from .constants import POSSIBLE_PREFIX
+from .config import Config, jav_config
 
 __plugin_meta__ = PluginMetadata(
     name="nonebot-plugin-flo-jav",
     description="Florenz的JAV元数据查询插件。",
     usage="""
     jav.q avid 查询番号为avid的元数据
+    jav.q avid1 avid2 ... 批量查询多个番号
+    jav.q -r 随机查询一部作品
+    jav.s 关键词... [-p 页码] 在本地数据库中全文检索
+    jav.actor 名字 [-p 页码] 在本地数据库中按演员查找（jav.series / jav.producer / jav.genre 同理）
+    jav.stats 查看运行统计（仅超级用户）
+    jav.reparse 用缓存的详情页重新解析元数据（仅超级用户）
     """,
     homepage="https://github.com/Florenz0707/nonebot-plugin-flo-jav",
     type="application",
@@ -32,23 +43,111 @@ __plugin_meta__ = PluginMetadata(
     }
 )
 
+driver = get_driver()
+thumbnailer = Thumbnailer(
+    jav_config.jav_thumbnail,
+    jav_config.jav_thumbnail_max_size,
+    jav_config.jav_thumbnail_quality,
+    jav_config.jav_thumbnail_format,
+    jav_config.jav_thumbnail_workers,
+)
+background_jobs = BackgroundJobs()
+background_jobs.every(
+    "番号索引扩展",
+    jav_config.jav_index_grow_interval,
+    lambda: scraper_manager.grow_index(jav_config.jav_index_grow_batch),
+    lambda: scraper_manager.is_idle(jav_config.jav_idle_seconds),
+)
+prefetcher = Prefetcher(
+    scraper_manager,
+    jav_config.jav_prefetch_budget,
+    jav_config.jav_prefetch_concurrency,
+    jav_config.jav_prefetch_max_pages,
+    jav_config.jav_prefetch_hours,
+)
+background_jobs.every(
+    "新作预取",
+    jav_config.jav_prefetch_interval,
+    prefetcher.crawl,
+    lambda: prefetcher.is_off_peak() and scraper_manager.is_idle(jav_config.jav_idle_seconds),
+)
 
-async def intro_sender(info: AVInfo, uid: str):
-    content = (UniMessage.text(info.to_string()).
-               image(path=scraper_manager.get_image_path(info.get_avid())))
-    node = CustomNode(uid=uid, name="", content=content)
+
+async def metrics_endpoint(request: Request) -> Response:
+    return Response(200, headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+                    content=metrics.render())
+
+
+if jav_config.jav_metrics_path:
+    if isinstance(driver, ASGIMixin):
+        driver.setup_http_server(
+            HTTPServerSetup(URL(jav_config.jav_metrics_path), "GET", "jav_metrics", metrics_endpoint)
+        )
+    else:
+        logger.warning("当前驱动不支持 HTTP 服务，指标接口未开启")
+
+
+@driver.on_startup
+async def _startup():
+    await scraper_manager.covers.reconcile()
+    background_jobs.start()
+
+
+@driver.on_shutdown
+async def _shutdown():
+    await background_jobs.stop()
+    await scraper_manager.close()
+    thumbnailer.close()
+    RepoBase.shutdown()
+
+
+async def cover_message(info: AVInfo) -> Optional[UniMessage]:
+    """封面消息，封面获取失败时返回 None"""
+    if cover := await scraper_manager.get_cover(info):
+        with metrics.span("thumbnail"):
+            return UniMessage.image(path=await thumbnailer.get_or_create(cover))
+    return None
+
+
+async def intro_node(info: AVInfo, uid: str) -> CustomNode:
+    content = UniMessage.text(info.to_string())
+    if cover := await cover_message(info):
+        content += cover
+    return CustomNode(uid=uid, name="", content=content)
+
+
+async def reference_sender(nodes: list[CustomNode], label: str):
     try:
-        await UniMessage.reference(node).send()
+        with metrics.span("send"):
+            await UniMessage.reference(*nodes).send()
     except Exception as error:
         error = str(error)
         if "发送转发消息" in error and "失败" in error:
-            await UniMessage.text(f"[{info.get_avid()}]发送转发消息失败了！").send()
+            await UniMessage.text(f"[{label}]发送转发消息失败了！").send()
+
+
+async def intro_sender(info: AVInfo, uid: str):
+    if not jav_config.jav_progressive:
+        await reference_sender([await intro_node(info, uid)], info.get_avid())
+        return
+    # 渐进模式：先发文字，封面到达后再单独发送，封面失败时只有文字
+    await reference_sender([CustomNode(uid=uid, name="", content=UniMessage.text(info.to_string()))],
+                           info.get_avid())
+    if cover := await cover_message(info):
+        await reference_sender([CustomNode(uid=uid, name="", content=cover)], info.get_avid())
+
+
+async def batch_sender(results: dict[str, Optional[AVInfo]], uid: str):
+    nodes = [await intro_node(info, uid) for info in results.values() if info is not None]
+    if missing := [avid for avid, info in results.items() if info is None]:
+        nodes.append(CustomNode(uid=uid, name="", content=UniMessage.text(f"未找到：{'、'.join(missing)}")))
+    await reference_sender(nodes, f"{len(results)}个番号")
 
 
 query = on_alconna(
     Alconna(
         "jav.q",
-        Args["avid", str],
+        Args["avids", MultiVar(str)],
     ),
     use_cmd_start=True,
 )
@@ -57,25 +156,153 @@ query = on_alconna(
 @query.handle()
 async def abstract_handler(
         session: Uninfo,
-        avid: Match[str] = AlconnaMatch("avid")):
-    if not avid.available:
+        avids: Match[tuple[str, ...]] = AlconnaMatch("avids")):
+    if not avids.available:
         await UniMessage.text("听不懂哦~ 再试一次吧~").finish()
-    avid = avid.result.upper()
+    # 支持空格、换行、逗号分隔的粘贴列表
+    avids = [avid.upper() for avid in re.split(r"[\s,，、;；]+", " ".join(avids.result)) if avid]
+    avids = list(dict.fromkeys(avids))
+    if not avids:
+        await UniMessage.text("听不懂哦~ 再试一次吧~").finish()
+    if len(avids) > 1:
+        if len(avids) > jav_config.jav_batch_max:
+            await UniMessage.text(f"一次最多查询{jav_config.jav_batch_max}个番号哦~").finish()
+        await UniMessage.text(f"正在查询{len(avids)}个番号...").send()
+        results = await scraper_manager.scrape_many(avids)
+        if not any(results.values()):
+            await UniMessage.text("一个都没有找到呢~").finish()
+        await batch_sender(results, session.self_id)
+        return
+    avid = avids[0]
     if avid == "-R":
         await UniMessage.text("正在生成...").send()
-        random.seed(int(time.time()))
-        retry = 7
-        while retry > 0:
-            retry -= 1
-            prefix = random.choice(POSSIBLE_PREFIX)
-            number = random.randint(1, 999)
-            if info := await scraper_manager.scrape_from_any(f"{prefix}-{number:03d}"):
-                await intro_sender(info, session.self_id)
-                return
+        if info := await scraper_manager.scrape_random(jav_config.jav_random_attempts,
+                                                      jav_config.jav_random_fanout,
+                                                      jav_config.jav_random_known_ratio):
+            await intro_sender(info, session.self_id)
+            return
         await UniMessage.text("找了好久都没有找到呢~重试一下吧！").finish()
     else:
         await UniMessage.text("正在查询...").send()
-        info = await scraper_manager.scrape_from_any(avid)
+        info = await scraper_manager.scrape_from_any(avid, wait_cover=not jav_config.jav_progressive)
         if info is None:
             await UniMessage.text("可能是avid不存在，也可能是其他错误呢~").finish()
         await intro_sender(info, session.self_id)
+
+
+async def listing_sender(header: str, infos: list[AVInfo], total: int, page: int):
+    pages = (total + jav_config.jav_page_size - 1) // jav_config.jav_page_size
+    lines = [f"{header}：共{total}部，第{page}/{pages}页"]
+    lines.extend(f"{info.get_avid()} {info.get_release_date() or ''} {info.get_title()}" for info in infos)
+    with metrics.span("send"):
+        await UniMessage.text("\n".join(lines)).send()
+
+
+search = on_alconna(
+    Alconna(
+        "jav.s",
+        Args["words", MultiVar(str)],
+        Option("-p|--page", Args["page", int]),
+    ),
+    use_cmd_start=True,
+)
+
+
+@search.handle()
+async def search_handler(
+        words: Match[tuple[str, ...]] = AlconnaMatch("words"),
+        page: Match[int] = AlconnaMatch("page")):
+    keywords = list(dict.fromkeys(word for word in " ".join(words.result).split() if word)) if words.available else []
+    page = max(1, page.result) if page.available else 1
+    if not keywords:
+        await UniMessage.text("要搜索什么呢~").finish()
+    total, infos = await scraper_manager.search(keywords, page, jav_config.jav_page_size)
+    if not total:
+        await UniMessage.text("本地没有找到相关作品哦~").finish()
+    if not infos:
+        await UniMessage.text(f"只有{total}条结果，没有第{page}页哦~").finish()
+    await listing_sender(f"「{' '.join(keywords)}」", infos, total, page)
+
+
+# 本地标签检索指令 -> (标签种类, 名称)
+TAG_COMMANDS = {
+    "jav.actor": ("actor", "演员"),
+    "jav.series": ("series", "系列"),
+    "jav.producer": ("producer", "制作商"),
+    "jav.genre": ("genre", "类别"),
+}
+
+
+def tag_handler(kind: str, label: str):
+    async def handler(
+            words: Match[tuple[str, ...]] = AlconnaMatch("words"),
+            page: Match[int] = AlconnaMatch("page")):
+        name = " ".join(words.result).strip() if words.available else ""
+        page = max(1, page.result) if page.available else 1
+        if not name:
+            await UniMessage.text(f"要查找哪个{label}呢~").finish()
+        total, infos = await scraper_manager.find_by_tag(kind, name, page, jav_config.jav_page_size)
+        if not total:
+            await UniMessage.text(f"本地还没有{label}「{name}」的作品哦~").finish()
+        if not infos:
+            await UniMessage.text(f"{label}「{name}」只有{total}部作品，没有第{page}页哦~").finish()
+        await listing_sender(f"{label}「{name}」", infos, total, page)
+
+    return handler
+
+
+for command, (kind, label) in TAG_COMMANDS.items():
+    on_alconna(
+        Alconna(
+            command,
+            Args["words", MultiVar(str)],
+            Option("-p|--page", Args["page", int]),
+        ),
+        use_cmd_start=True,
+    ).handle()(tag_handler(kind, label))
+
+
+stats = on_alconna(
+    Alconna("jav.stats"),
+    use_cmd_start=True,
+    permission=SUPERUSER,
+)
+
+
+@stats.handle()
+async def stats_handler():
+    lines = ["[耗时] 次数 / 平均 / p95 / 出错"]
+    for stage in metrics.get_stages():
+        labels = stage["labels"]
+        name = labels.pop("stage")
+        if labels:
+            name += f"({','.join(labels.values())})"
+        lines.append(f"{name}: {stage['count']} / {stage['mean'] * 1000:.1f}ms / "
+                     f"≤{stage['p95'] * 1000:g}ms / {stage['errors']:g}")
+    lines.append("[计数]")
+    lines.extend(f"{name}: {value:g}" for name, value in metrics.get_counters().items())
+    cache = scraper_manager.cache.stats()
+    lines.append(f"[缓存] {cache['size']}/{cache['max_size']} 条，命中率 {cache['hit_rate']:.1%}")
+    lines.append("[镜像] 延迟 / 成功率 / 排队 / 熔断 / Cookie")
+    cookie_ages = scraper_manager.get_cookie_ages()
+    for name, health in scraper_manager.get_health().items():
+        cookie_age = f"{cookie_ages[name] / 3600:.1f}h" if cookie_ages[name] is not None else "无"
+        lines.append(f"{name}: {health['latency'] * 1000:.0f}ms / {health['success_rate']:.0%} / "
+                     f"{scraper_manager.get_queue_depth()[name]} / {'是' if health['open'] else '否'} / {cookie_age}")
+    await UniMessage.text("\n".join(lines)).finish()
+
+
+reparse = on_alconna(
+    Alconna("jav.reparse"),
+    use_cmd_start=True,
+    permission=SUPERUSER,
+)
+
+
+@reparse.handle()
+async def reparse_handler():
+    await UniMessage.text("正在重新解析缓存的页面...").send()
+    pages, parsed = await scraper_manager.reparse()
+    if not pages:
+        await UniMessage.text("页面缓存是空的哦~").finish()
+    await UniMessage.text(f"重新解析了{pages}个页面，更新{parsed}部作品的元数据").finish()
@@ -0,0 +1,156 @@
+"""
+封面库 - 按内容摘要存放封面：内容相同的封面只存一份，文件按摘要前缀分两级子目录存放，
+总大小超过上限时按最近访问时间淘汰，启动时与数据库中的记录对账
+"""
+import asyncio
+import os
+import re
+import shutil
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+
+from nonebot.log import logger
+
+from ..repository.CoverRepo import CoverRepo
+from ..utils import verify_image, file_checksum, metrics
+
+DIGEST_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+
+class CoverStore:
+    """
+    封面文件存放在 <root>/ab/cd/<abcd...>（SHA-256 摘要），缩略图与其他派生文件以 <摘要>. 开头放在同一目录，
+    随原图一起淘汰；番号到摘要的对应关系与访问时间记录在数据库中
+    """
+
+    def __init__(self, root: Path, repo: CoverRepo, max_size: int = 0):
+        """
+        :param max_size: 封面原图的总大小上限（字节，不含缩略图），0 表示不限
+        """
+        self.root = root
+        self.repo = repo
+        self.max_size = max_size
+        # 下载中的封面先落在暂存目录，得到摘要后再移入库中
+        self.staging = root / "incoming"
+        # 由内存缓存直接返回的封面访问，下次写入时一并落盘
+        self._accesses: dict[str, float] = {}
+
+    def get_path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:4] / digest
+
+    def get_staging_path(self, avid: str) -> Path:
+        return self.staging / avid.upper()
+
+    def touch(self, avid: str):
+        """记录一次不经过数据库的封面访问"""
+        self._accesses[avid.upper()] = time.time()
+
+    async def get(self, avid: str) -> Optional[Path]:
+        """
+        返回番号的封面文件，没有记录或文件丢失、大小不符时返回 None
+        文件名即内容摘要，这里只比对大小；完整的摘要校验在写入时与启动对账时进行
+        """
+        if (row := await self.repo.get_async(avid.upper())) is None:
+            return None
+        digest, size = row
+        path = self.get_path(digest)
+        if self._has_file(path, size):
+            return path
+        logger.warning(f"封面文件损坏或丢失: {path}")
+        await self.repo.remove_digests_async([digest])
+        await asyncio.to_thread(self._remove_files, [digest])
+        return None
+
+    async def add(self, avid: str, staged: Path, digest: str) -> Path:
+        """把暂存区中下载好的封面移入库中，已有内容相同的文件时直接复用，必要时淘汰旧封面"""
+        path = self.get_path(digest)
+        size, reused = await asyncio.to_thread(self._move_in, staged, path, digest)
+        metrics.inc("covers_stored_total", result="dedup" if reused else "new")
+        await self.flush()
+        if removed := await self.repo.put_async(avid.upper(), digest, size, self.max_size):
+            await asyncio.to_thread(self._remove_files, removed)
+        return path
+
+    async def flush(self):
+        """写入积攒的访问时间"""
+        if self._accesses:
+            accesses, self._accesses = self._accesses, {}
+            await self.repo.touch_many_async(list(accesses.items()))
+
+    async def reconcile(self) -> dict[str, int]:
+        """
+        启动时对账：迁移旧版平铺存放的封面，逐个校验文件摘要，删除没有记录的文件与缺少文件（或文件损坏）的记录，
+        并按上限淘汰
+        :return: 各项处理的数量
+        """
+        return await asyncio.to_thread(self._reconcile)
+
+    def _reconcile(self) -> dict[str, int]:
+        stats = {"migrated": 0, "orphans": 0, "missing": 0, "evicted": 0}
+        self.root.mkdir(parents=True, exist_ok=True)
+        shutil.rmtree(self.staging, ignore_errors=True)
+
+        # 旧版本以番号为文件名平铺在根目录，旁边是 .sha256 校验和与缩略图
+        for path in list(self.root.iterdir()):
+            if not path.is_file():
+                continue
+            if "." not in path.name and verify_image(path):
+                digest = file_checksum(path)
+                size, _ = self._move_in(path, self.get_path(digest), digest)
+                self.repo.put(path.name.upper(), digest, size)
+                stats["migrated"] += 1
+            else:
+                path.unlink(missing_ok=True)
+
+        known = self.repo.get_digests()
+        present = set()
+        for directory in self.root.glob("??/??"):
+            for path in directory.iterdir():
+                digest = path.name.split(".", 1)[0]
+                if digest not in known:
+                    path.unlink(missing_ok=True)
+                    stats["orphans"] += DIGEST_PATTERN.fullmatch(path.name) is not None
+                elif path.name == digest and verify_image(path, digest):
+                    present.add(digest)
+        if missing := known - present:
+            stats["missing"] = self.repo.remove_digests(missing)
+            self._remove_files(missing)
+        if self.max_size and self.repo.total_size > self.max_size:
+            evicted = self.repo.shrink(self.max_size)
+            self._remove_files(evicted)
+            stats["evicted"] = len(evicted)
+
+        logger.info(f"封面库对账完成，迁移 {stats['migrated']} 个旧封面，删除 {stats['orphans']} 个无记录的文件、"
+                    f"{stats['missing']} 条缺少文件或文件损坏的记录，淘汰 {stats['evicted']} 个文件，"
+                    f"当前共 {self.repo.total_size} 字节")
+        return stats
+
+    @staticmethod
+    def _has_file(path: Path, size: int) -> bool:
+        try:
+            return path.stat().st_size == size
+        except OSError:
+            return False
+
+    @classmethod
+    def _move_in(cls, staged: Path, path: Path, digest: str) -> tuple[int, bool]:
+        """
+        已有内容相同（摘要一致）的文件时删除暂存文件，否则用暂存文件替换
+        :return: (文件大小, 是否复用了已有的文件)
+        """
+        size = staged.stat().st_size
+        if cls._has_file(path, size) and verify_image(path, digest):
+            staged.unlink()
+            return size, True
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(staged, path)
+        return size, False
+
+    def _remove_files(self, digests: Iterable[str]):
+        """删除封面文件及其缩略图"""
+        for digest in digests:
+            path = self.get_path(digest)
+            path.unlink(missing_ok=True)
+            for derived in path.parent.glob(f"{digest}.*"):
+                derived.unlink(missing_ok=True)
@@ -0,0 +1,110 @@
+"""
+元数据内存缓存 - 以 AVID 为键缓存 AVInfo 与已知的封面路径
+"""
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from ..model import AVInfo
+
+
+class CacheEntry:
+    """缓存条目，info 为 None 表示该 AVID 已确认不存在（负缓存）"""
+    __slots__ = ("info", "cover_path", "expires_at")
+
+    def __init__(self, info: Optional[AVInfo], cover_path: Optional[Path], expires_at: Optional[float]):
+        self.info = info
+        self.cover_path = cover_path
+        self.expires_at = expires_at
+
+    def is_missing(self) -> bool:
+        return self.info is None
+
+    def is_expired(self, now: float) -> bool:
+        return self.expires_at is not None and now >= self.expires_at
+
+
+class MetadataCache:
+    """LRU 淘汰、可选 TTL 的元数据缓存"""
+
+    def __init__(self, max_size: int = 1024, ttl: float = 0, negative_ttl: float = 600):
+        """
+        :param max_size: 最多缓存的条目数，0 表示关闭缓存
+        :param ttl: 正常条目的存活时间（秒），0 表示不过期
+        :param negative_ttl: 负缓存条目的存活时间（秒），0 表示不做负缓存
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, avid: str) -> Optional[CacheEntry]:
+        """查询缓存，命中时将条目移到 LRU 队尾"""
+        entry = self._entries.get(avid)
+        if entry is not None and entry.is_expired(time.monotonic()):
+            del self._entries[avid]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(avid)
+        if entry.is_missing():
+            self.negative_hits += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def peek(self, avid: str) -> Optional[CacheEntry]:
+        """查询缓存但不计入命中统计、不调整 LRU 顺序"""
+        entry = self._entries.get(avid)
+        if entry is not None and entry.is_expired(time.monotonic()):
+            return None
+        return entry
+
+    def put(self, avid: str, info: AVInfo, cover_path: Optional[Path] = None):
+        self._store(avid, CacheEntry(info, cover_path, self._expires_at(self.ttl)))
+
+    def put_missing(self, avid: str):
+        """记录已确认不存在的 AVID"""
+        if self.negative_ttl > 0:
+            self._store(avid, CacheEntry(None, None, self._expires_at(self.negative_ttl)))
+
+    def set_cover(self, avid: str, cover_path: Optional[Path]):
+        if (entry := self._entries.get(avid)) is not None and not entry.is_missing():
+            entry.cover_path = cover_path
+
+    def invalidate(self, avid: str):
+        self._entries.pop(avid, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.negative_hits) / lookups if lookups else 0.0,
+        }
+
+    def _store(self, avid: str, entry: CacheEntry):
+        if self.max_size <= 0:
+            return
+        self._entries[avid] = entry
+        self._entries.move_to_end(avid)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def _expires_at(ttl: float) -> Optional[float]:
+        return time.monotonic() + ttl if ttl > 0 else None
@@ -0,0 +1,69 @@
+"""
+页面磁盘缓存 - 以 URL 为键保存压缩后的详情页，TTL 内直接使用，过期后带 ETag / Last-Modified 条件请求重新验证
+"""
+import time
+import zlib
+from typing import Optional
+
+from ..repository.PageCacheRepo import PageCacheRepo
+
+
+class CachedPage:
+    __slots__ = ("text", "etag", "last_modified", "fetched_at")
+
+    def __init__(self, text: str, etag: Optional[str], last_modified: Optional[str], fetched_at: float):
+        self.text = text
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+
+class PageCache:
+    """详情页缓存，页面以 zlib 压缩后存入数据库，总大小超过上限时按最近访问时间淘汰"""
+
+    def __init__(self, repo: PageCacheRepo, max_size: int = 256 * 1024 * 1024, ttl: float = 3600):
+        """
+        :param max_size: 压缩后的总大小上限（字节），0 表示关闭缓存
+        :param ttl: 缓存页面无需验证即可直接使用的时长（秒），0 表示每次都发条件请求验证
+        """
+        self.repo = repo
+        self.max_size = max_size
+        self.ttl = ttl
+
+    @staticmethod
+    def compress(text: str) -> bytes:
+        return zlib.compress(text.encode("utf-8"), 6)
+
+    @staticmethod
+    def decompress(body: bytes) -> str:
+        return zlib.decompress(body).decode("utf-8")
+
+    async def get(self, url: str) -> Optional[CachedPage]:
+        if self.max_size <= 0:
+            return None
+        if (row := await self.repo.get_async(url)) is None:
+            return None
+        etag, last_modified, fetched_at, body = row
+        return CachedPage(self.decompress(body), etag, last_modified, fetched_at)
+
+    def is_fresh(self, page: CachedPage) -> bool:
+        return time.time() - page.fetched_at < self.ttl
+
+    @staticmethod
+    def conditional_headers(page: CachedPage) -> dict[str, str]:
+        """重新验证缓存页面用的请求头"""
+        headers = {}
+        if page.etag:
+            headers["If-None-Match"] = page.etag
+        if page.last_modified:
+            headers["If-Modified-Since"] = page.last_modified
+        return headers
+
+    async def put(self, url: str, avid: str, source: str, text: str,
+                  etag: Optional[str], last_modified: Optional[str]):
+        if self.max_size > 0:
+            await self.repo.put_async(url, avid, source, etag, last_modified, self.compress(text), self.max_size)
+
+    async def touch(self, url: str):
+        """页面未改变（304）时刷新抓取时间"""
+        await self.repo.touch_async(url)
@@ -0,0 +1,102 @@
+"""
+封面缩略图 - 在进程池中把封面压缩、缩小为发送用的版本，并缓存在原图旁边
+依赖 Pillow（可选），未安装时直接发送原图
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from nonebot.log import logger
+
+from ..utils import SingleFlight
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# 配置中的格式名 -> (Pillow 格式名, 扩展名)
+FORMATS = {
+    "jpeg": ("JPEG", "jpg"),
+    "webp": ("WEBP", "webp"),
+}
+
+
+def transcode(source: str, target: str, max_size: int, quality: int, pillow_format: str):
+    """在工作进程中执行：缩放到 max_size 以内并按指定格式与质量保存，先写临时文件再重命名"""
+    temp = f"{target}.part"
+    with Image.open(source) as image:
+        image.thumbnail((max_size, max_size))
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        image.save(temp, format=pillow_format, quality=quality, optimize=True)
+    os.replace(temp, target)
+
+
+class Thumbnailer:
+    """缩略图生成与缓存"""
+
+    def __init__(self, enabled: bool = True, max_size: int = 1000, quality: int = 80,
+                 image_format: str = "jpeg", workers: int = 1):
+        self.enabled = enabled and Image is not None
+        self.max_size = max_size
+        self.quality = quality
+        self.pillow_format, self.extension = FORMATS.get(image_format.lower(), FORMATS["jpeg"])
+        self.workers = workers
+        self._executor: Optional[Executor] = None
+        self._jobs = SingleFlight()
+        if enabled and Image is None:
+            logger.warning("未安装 Pillow，将直接发送原始封面")
+
+    def get_thumbnail_path(self, path: Path) -> Path:
+        return path.with_name(f"{path.name}.thumb.{self.extension}")
+
+    async def get_or_create(self, path: Path) -> Path:
+        """
+        返回用于发送的图片路径：已缓存且不旧于原图的缩略图直接返回，否则生成；
+        未启用或生成失败时返回原图
+        """
+        if not self.enabled:
+            return path
+        thumbnail = self.get_thumbnail_path(path)
+        try:
+            if await asyncio.to_thread(self._is_fresh, path, thumbnail):
+                return thumbnail
+            await self._jobs.do(thumbnail, lambda: self._create(path, thumbnail))
+            return thumbnail
+        except Exception as e:
+            logger.error(f"生成缩略图失败: {e}")
+            return path
+
+    def _get_executor(self) -> Executor:
+        """
+        以 fork 方式启动的进程池；spawn 方式的子进程会重新导入插件包（需要已初始化的 NoneBot），
+        因此没有 fork 的平台改用线程池（Pillow 缩放与编码时会释放 GIL）
+        """
+        if self._executor is None:
+            if "fork" in multiprocessing.get_all_start_methods():
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context("fork"))
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="flo_jav_thumb")
+        return self._executor
+
+    async def _create(self, path: Path, thumbnail: Path):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._get_executor(), transcode, str(path), str(thumbnail),
+                                   self.max_size, self.quality, self.pillow_format)
+
+    @staticmethod
+    def _is_fresh(path: Path, thumbnail: Path) -> bool:
+        try:
+            return thumbnail.stat().st_mtime >= path.stat().st_mtime
+        except FileNotFoundError:
+            return False
+
+    def close(self):
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            executor.shutdown(wait=True)
@@ -0,0 +1,13 @@
+from .MetadataCache import MetadataCache, CacheEntry
+from .Thumbnailer import Thumbnailer
+from .PageCache import PageCache, CachedPage
+from .CoverStore import CoverStore
+
+__all__ = [
+    "MetadataCache",
+    "CacheEntry",
+    "Thumbnailer",
+    "PageCache",
+    "CachedPage",
+    "CoverStore",
+]
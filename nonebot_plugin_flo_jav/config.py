@@ -13,6 +13,94 @@ database_file: Path = data_dir / 'flo_jav.db'
 
 class Config(BaseModel):
     jav_proxy: str = None
+    # 单次 HTTP 请求超时（秒）
+    jav_timeout: int = 15
+    # 对冲延迟（秒）：前一个镜像在该时间内未返回时启动下一个镜像，0 表示同时请求所有镜像
+    jav_hedge_delay: float = 1.5
+    # 一次查询在所有镜像上花费的总时长上限（秒）
+    jav_race_timeout: float = 30
+    # 统计镜像延迟与错误率的最近请求数
+    jav_health_window: int = 20
+    # 镜像连续失败多少次后熔断
+    jav_breaker_threshold: int = 3
+    # 镜像熔断持续时间（秒）
+    jav_breaker_cooldown: float = 300
+    # 每个镜像域名的最大并发连接数（长连接池大小）
+    jav_max_connections: int = 10
+    # 每个镜像域名每秒允许发起的请求数，0 表示不限速
+    jav_rate_limit: float = 2
+    # 每个镜像域名允许的突发请求数（令牌桶容量）
+    jav_rate_burst: int = 5
+    # 每个镜像域名同时进行的请求数上限，超出的请求排队等待，0 表示不限制
+    jav_max_in_flight: int = 4
+    # 镜像下发的 Cookie 保存多久（秒）后主动重新领取，0 表示只在 Cookie 过期或请求被拦截时重新领取
+    jav_cookie_max_age: float = 24 * 3600
+    # Prometheus 指标的 HTTP 路径（挂载在 FastAPI 等 ASGI 驱动上），为空时不开启
+    jav_metrics_path: str = "/jav/metrics"
+    # 封面图片大小上限（字节）
+    jav_image_max_size: int = 10 * 1024 * 1024
+    # 封面库的总大小上限（字节，不含缩略图），超出时淘汰最久未访问的封面，0 表示不限
+    jav_cover_store_size: int = 2 * 1024 * 1024 * 1024
+    # 渐进模式：先发送文字元数据，封面下载完成后再单独发送
+    jav_progressive: bool = False
+    # 发送压缩后的封面（需要安装 Pillow）
+    jav_thumbnail: bool = True
+    # 压缩封面的最大边长（像素）
+    jav_thumbnail_max_size: int = 1000
+    # 压缩封面的质量（1-100）
+    jav_thumbnail_quality: int = 80
+    # 压缩封面的格式：jpeg 或 webp
+    jav_thumbnail_format: str = "jpeg"
+    # 生成压缩封面的进程数
+    jav_thumbnail_workers: int = 1
+    # 内存元数据缓存的最大条目数，0 表示关闭
+    jav_cache_size: int = 1024
+    # 内存缓存条目的存活时间（秒），0 表示不过期
+    jav_cache_ttl: float = 0
+    # 确认不存在的番号的缓存时间（秒），0 表示不做负缓存
+    jav_negative_cache_ttl: float = 600
+    # 元数据刮削后多久（秒）视为过期：过期数据照常返回，同时在后台重新刮削，0 表示不刷新
+    jav_refresh_age: float = 3 * 24 * 3600
+    # 作品发行多少天后刮削的元数据视为稳定，不再刷新，0 表示始终按 jav_refresh_age 刷新
+    jav_refresh_window: int = 60
+    # 两次后台刷新之间的最小间隔（秒）
+    jav_refresh_interval: float = 10
+    # 元数据写缓冲的合并时间窗口（秒），窗口内的写入合并为一次提交，0 表示立即写入
+    jav_write_delay: float = 0.05
+    # 写缓冲攒够多少条时立即提交
+    jav_write_batch: int = 100
+    # 详情页磁盘缓存（压缩后）的总大小上限（字节），超出时淘汰最久未访问的页面，0 表示不缓存
+    jav_page_cache_size: int = 256 * 1024 * 1024
+    # 缓存的详情页在多久（秒）内直接使用，过期后带 ETag / Last-Modified 向镜像验证，0 表示每次都验证
+    jav_page_cache_ttl: float = 3600
+    # 批量查询一次最多接受的番号数
+    jav_batch_max: int = 20
+    # 本地检索（jav.s 与按演员、系列等查找）每页的结果数
+    jav_page_size: int = 10
+    # 批量查询时同时刮削的番号数
+    jav_batch_concurrency: int = 4
+    # 随机模式的候选番号数
+    jav_random_attempts: int = 7
+    # 随机模式同时探测的候选数
+    jav_random_fanout: int = 3
+    # 随机模式候选中取自番号索引（已确认存在的番号）的比例
+    jav_random_known_ratio: float = 0.5
+    # 距上次用户查询超过该时长（秒）才视为空闲，后台任务只在空闲时运行
+    jav_idle_seconds: float = 120
+    # 后台扩展番号索引的间隔（秒），0 表示关闭
+    jav_index_grow_interval: float = 600
+    # 每次扩展番号索引时探测的番号数
+    jav_index_grow_batch: int = 3
+    # 后台预取新作的间隔（秒），0 表示关闭
+    jav_prefetch_interval: float = 1800
+    # 后台预取允许运行的时段（小时，结束不含，可跨午夜，如 22-6），为空时不限
+    jav_prefetch_hours: str = "2-7"
+    # 每轮预取最多请求的页面数（列表页与详情页合计）
+    jav_prefetch_budget: int = 40
+    # 预取时同时刮削的作品数
+    jav_prefetch_concurrency: int = 2
+    # 每个预取目标（最新发行或某个前缀）最多遍历的列表页数
+    jav_prefetch_max_pages: int = 3
 
 
 jav_config = get_plugin_config(Config)
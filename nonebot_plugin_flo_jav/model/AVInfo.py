@@ -1,7 +1,22 @@
+from datetime import datetime
 from typing import Optional
 
+# scraped_at 的格式，按字符串比较即可得到时间先后
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# 字段顺序，与数据库中 AVInfo 表的列顺序一致
+FIELDS = ("avid", "title", "source", "release_date", "duration", "producer",
+          "publisher", "series", "category", "actors", "image_url", "scraped_at")
+
 
 class AVInfo:
+    """
+    作品元数据
+    使用 __slots__ 存放字段，没有实例 __dict__；可以直接由数据库行（按 FIELDS 顺序）构造，
+    序列化为同样顺序的元组
+    """
+    __slots__ = tuple(f"_{field}" for field in FIELDS)
+
     def __init__(self):
         self._avid: Optional[str] = ""
         self._title: Optional[str] = ""
@@ -14,6 +29,32 @@ class AVInfo:
         self._category: Optional[str] = ""
         self._actors: Optional[str] = ""
         self._image_url: Optional[str] = ""
+        self._scraped_at: Optional[str] = ""
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "AVInfo":
+        """按 FIELDS 顺序的元组构造，不经过 __init__"""
+        info = cls.__new__(cls)
+        (info._avid, info._title, info._source, info._release_date, info._duration, info._producer,
+         info._publisher, info._series, info._category, info._actors, info._image_url, info._scraped_at) = row
+        return info
+
+    @staticmethod
+    def row_factory(cursor, row: tuple) -> "AVInfo":
+        """sqlite3 的 row_factory，查询的列须按 FIELDS 顺序"""
+        return AVInfo.from_row(row)
+
+    def to_tuple(self) -> tuple:
+        """按 FIELDS 顺序导出为元组，用于写库、缓存与进程间传递"""
+        return (self._avid, self._title, self._source, self._release_date, self._duration, self._producer,
+                self._publisher, self._series, self._category, self._actors, self._image_url, self._scraped_at)
+
+    def __getstate__(self) -> tuple:
+        return self.to_tuple()
+
+    def __setstate__(self, state: tuple):
+        (self._avid, self._title, self._source, self._release_date, self._duration, self._producer,
+         self._publisher, self._series, self._category, self._actors, self._image_url, self._scraped_at) = state
 
     def get_avid(self) -> Optional[str]:
         return self._avid
@@ -48,53 +89,24 @@ class AVInfo:
     def get_image_url(self) -> Optional[str]:
         return self._image_url
 
+    def get_scraped_at(self) -> Optional[str]:
+        """刮削时间，迁移前入库的旧数据为 None"""
+        return self._scraped_at
+
     @classmethod
-    def generate_from_scrapper(cls, scrape_data: dict):
+    def generate_from_scrapper(cls, scrape_data: dict, scraped_at: Optional[datetime] = None):
         """
-        从刮削器数据更新元数据
+        从刮削器数据生成元数据，缺失的字段为空字符串
         :param scrape_data:
+        :param scraped_at: 刮削时间，默认为当前时间
         :return:
         """
-        info = AVInfo()
-        if scrape_data.get("avid"):
-            info._avid = scrape_data.get("avid")
-        if scrape_data.get("title"):
-            info._title = scrape_data.get("title")
-        if scrape_data.get("source"):
-            info._source = scrape_data.get("source")
-        if scrape_data.get('release_date'):
-            info._release_date = scrape_data.get('release_date')
-        if scrape_data.get('duration'):
-            info._duration = scrape_data.get('duration')
-        if scrape_data.get('producer'):
-            info._producer = scrape_data.get('producer')
-        if scrape_data.get('publisher'):
-            info._publisher = scrape_data.get('publisher')
-        if scrape_data.get('series'):
-            info._series = scrape_data.get('series')
-        if scrape_data.get('category'):
-            info._category = scrape_data.get('category')
-        if scrape_data.get('actors'):
-            info._actors = scrape_data.get('actors')
-        if scrape_data.get('image_url'):
-            info._image_url = scrape_data.get('image_url')
-        return info
+        return cls.from_row(tuple(scrape_data.get(field) or "" for field in FIELDS[:-1])
+                            + ((scraped_at or datetime.now()).strftime(TIME_FORMAT),))
 
     @classmethod
-    def generate_from_db(cls, data: tuple[str, str, str, str, str, str, str, str, str, str, str]):
-        result = AVInfo()
-        result._avid = data[0]
-        result._title = data[1]
-        result._source = data[2]
-        result._release_date = data[3]
-        result._duration = data[4]
-        result._producer = data[5]
-        result._publisher = data[6]
-        result._series = data[7]
-        result._category = data[8]
-        result._actors = data[9]
-        result._image_url = data[10]
-        return result
+    def generate_from_db(cls, data: tuple[str, str, str, str, str, str, str, str, str, str, str, str]):
+        return cls.from_row(data)
 
     def to_string(self):
         return f"AVID：{self._avid}\n标题：{self._title}\n来源：{self._source}\n发行日期：{self._release_date}\n" \
@@ -1,4 +1,7 @@
 from datetime import datetime
+from typing import Optional
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
 
 
 class SourceCookie:
@@ -17,6 +20,12 @@ class SourceCookie:
     def get_updated_at(self):
         return self._updated_at
 
+    def get_age(self) -> Optional[float]:
+        """距上次更新的秒数，没有更新时间时返回 None"""
+        if not self._updated_at:
+            return None
+        return (datetime.now() - datetime.strptime(self._updated_at, TIME_FORMAT)).total_seconds()
+
     @classmethod
     def generate_from_source(cls, cookie_dict: dict):
         """
@@ -27,18 +36,18 @@ class SourceCookie:
         result = SourceCookie()
         if cookie_dict.get("source") is None:
             return None
-        result.source = cookie_dict["source"]
+        result._source = cookie_dict["source"]
 
         if cookie_dict.get("cookie") is None:
             return None
-        result.cookie = cookie_dict["cookie"]
-        result.updated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        result._cookie = cookie_dict["cookie"]
+        result._updated_at = datetime.now().strftime(TIME_FORMAT)
         return result
 
     @classmethod
     def generate_from_db(cls, data: tuple[str, str, str]):
         result = SourceCookie()
-        result.source = data[0]
-        result.cookie = data[1]
-        result.updated_at = data[2]
+        result._source = data[0]
+        result._cookie = data[1]
+        result._updated_at = data[2]
         return result
@@ -0,0 +1,120 @@
+import re
+import sqlite3 as sql
+from datetime import datetime
+from typing import Optional
+
+from nonebot.log import logger
+
+from .RepoBase import RepoBase, locked
+
+AVID_PATTERN = re.compile(r"^([A-Z]+)-(\d+)$")
+
+
+def split_avid(avid: str) -> Optional[tuple[str, int]]:
+    """把 PREFIX-NNN 形式的番号拆成 (前缀, 编号)，其他形式返回 None"""
+    if match := AVID_PATTERN.match(avid.upper()):
+        return match.group(1), int(match.group(2))
+    return None
+
+
+class AVIndexRepo(RepoBase):
+    """
+    番号索引：记录已确认存在 / 不存在的番号，用于随机模式直接抽取与按前缀学习编号范围
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._cursor.execute("select name from sqlite_master where type = 'table' and name = 'AVIndex'")
+        created = self._cursor.fetchone() is None
+        self._cursor.execute("""
+                             create table if not exists AVIndex
+                             (
+                                 avid       text primary key,
+                                 prefix     text    not null,
+                                 number     integer not null,
+                                 found      integer not null,
+                                 checked_at text    not null
+                             )
+                             """)
+        self._cursor.execute("""
+                             create index if not exists AVIndex_prefix
+                                 on AVIndex (prefix, found, number)
+                             """)
+        self._database.commit()
+        if created:
+            self._seed_from_avinfo()
+
+    def _seed_from_avinfo(self):
+        """首次建立索引时，把已入库的番号全部登记为存在"""
+        self._cursor.execute("select name from sqlite_master where type = 'table' and name = 'AVInfo'")
+        if self._cursor.fetchone() is None:
+            return
+        self._cursor.execute("select distinct avid from AVInfo")
+        checked_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        rows = [(avid, *parts, 1, checked_at)
+                for avid, in self._cursor.fetchall() if (parts := split_avid(avid))]
+        self._cursor.executemany("""
+                                 insert or ignore into AVIndex(avid, prefix, number, found, checked_at)
+                                 values (?, ?, ?, ?, ?)
+                                 """, rows)
+        self._database.commit()
+        logger.info(f"番号索引初始化完成，共 {len(rows)} 条")
+
+    @locked
+    def record(self, avid: str, found: bool) -> bool:
+        """记录一次刮削结果"""
+        if (parts := split_avid(avid)) is None:
+            return False
+        try:
+            self._cursor.execute("""
+                                 insert into AVIndex(avid, prefix, number, found, checked_at)
+                                 values (?, ?, ?, ?, ?)
+                                 on conflict (avid) do update set found      = excluded.found,
+                                                                  checked_at = excluded.checked_at
+                                 """, (avid.upper(), *parts, int(found),
+                                       datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+            self._database.commit()
+        except sql.OperationalError as e:
+            logger.error(f"Error in record: {e}")
+            return False
+        return True
+
+    @locked
+    def sample_found(self, count: int) -> list[str]:
+        """随机取出 count 个已确认存在的番号"""
+        self._cursor.execute("""
+                             select avid
+                             from AVIndex
+                             where found = 1
+                             order by random()
+                             limit ?
+                             """, (count,))
+        return [row[0] for row in self._cursor.fetchall()]
+
+    @locked
+    def get_prefix_numbers(self, prefix: str) -> tuple[set[int], set[int]]:
+        """
+        获取某个前缀下已探测过的编号
+        :return: (存在的编号, 确认不存在的编号)
+        """
+        self._cursor.execute("""
+                             select number, found
+                             from AVIndex
+                             where prefix = ?
+                             """, (prefix,))
+        found, missing = set(), set()
+        for number, is_found in self._cursor.fetchall():
+            (found if is_found else missing).add(number)
+        return found, missing
+
+    async def record_async(self, avid: str, found: bool) -> bool:
+        return await self._run(self.record, avid, found)
+
+    async def sample_found_async(self, count: int) -> list[str]:
+        return await self._run(self.sample_found, count)
+
+    async def get_prefix_numbers_async(self, prefix: str) -> tuple[set[int], set[int]]:
+        return await self._run(self.get_prefix_numbers, prefix)
+
+
+avindex_repo = AVIndexRepo()
@@ -4,58 +4,174 @@ from typing import Optional
 
 from nonebot.log import logger
 
-from ..repository import RepoBase
+from .RepoBase import RepoBase, locked
 from ..model import AVInfo
+from ..model.AVInfo import FIELDS
+
+# 查询结果的列，与 AVInfo 的字段顺序一致，这样的查询可以用 _info_cursor 直接得到 AVInfo
+COLUMNS = FIELDS
+
+# 标签种类：演员、系列、制作商、类别
+TAG_KINDS = ("actor", "series", "producer", "genre")
+
+# 全文检索的列及其在 bm25 排序中的权重
+SEARCH_COLUMNS = {"avid": 10.0, "title": 5.0, "actors": 4.0, "series": 3.0, "producer": 2.0, "category": 1.0}
+
+# 按 (avid, source) 插入，已存在时覆盖其余字段
+UPSERT_SQL = """
+             insert into AVInfo(avid, title, source, release_date, duration, producer,
+                                publisher, series, category, actors, image_url, scraped_at)
+             values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+             on conflict (avid, source) do update set title        = excluded.title,
+                                                      release_date = excluded.release_date,
+                                                      duration     = excluded.duration,
+                                                      producer     = excluded.producer,
+                                                      publisher    = excluded.publisher,
+                                                      series       = excluded.series,
+                                                      category     = excluded.category,
+                                                      actors       = excluded.actors,
+                                                      image_url    = excluded.image_url,
+                                                      scraped_at   = excluded.scraped_at
+             """
+
+
+# id 是显式的整数主键（rowid 的别名），VACUUM 不会重新编号，全文索引以它为键
+CREATE_TABLE_SQL = """
+                   create table if not exists {table}
+                   (
+                       id           integer primary key,
+                       avid         text not null,
+                       title        text not null,
+                       source       text not null,
+                       release_date text,
+                       duration     text,
+                       producer     text,
+                       publisher    text,
+                       series       text,
+                       category     text,
+                       actors       text,
+                       image_url    text,
+                       scraped_at   text,
+                       unique (avid, source)
+                   )
+                   """
 
 
 class AVInfoRepo(RepoBase):
     def __init__(self):
         super().__init__()
-        create_table_cmd = """
-                           create table if not exists AVInfo
-                           (
-                               avid
-                               text
-                               not
-                               null,
-                               title
-                               text
-                               not
-                               null,
-                               source
-                               text
-                               not
-                               null,
-                               release_date
-                               text,
-                               duration
-                               text,
-                               producer
-                               text,
-                               publisher
-                               text,
-                               series
-                               text,
-                               category
-                               text,
-                               actors
-                               text,
-                               image_url
-                               text,
-                               primary
-                               key
-                           (
-                               avid,
-                               source
-                           )
-                               )
-                           """
-        self._cursor.execute(create_table_cmd)
+        self._cursor.execute(CREATE_TABLE_SQL.format(table="AVInfo"))
+        # 查询结果直接构造为 AVInfo 的游标，只用于按 COLUMNS 顺序选列的查询
+        self._info_cursor = self._database.cursor()
+        self._info_cursor.row_factory = AVInfo.row_factory
+        self._migrate()
+        self._cursor.execute("select name from sqlite_master where type = 'table' and name = 'AVTag'")
+        tags_created = self._cursor.fetchone() is None
+        self._cursor.execute("""
+                             create table if not exists AVTag
+                             (
+                                 kind text not null,
+                                 name text not null,
+                                 avid text not null,
+                                 primary key (kind, name, avid)
+                             ) without rowid
+                             """)
+        self._cursor.execute("""
+                             create index if not exists AVTag_avid
+                                 on AVTag (avid)
+                             """)
+        if tags_created:
+            self._rebuild_tags()
+        self._min_term_length = self._create_search_index()
         self._database.commit()
 
+    def _migrate(self):
+        """
+        为旧版本的表补上 scraped_at 列，旧数据的刮削时间为空，视为需要刷新；
+        没有 id 列的旧表重建为带整数主键的表（沿用原来的 rowid），并重建全文索引
+        """
+        self._cursor.execute("pragma table_info(AVInfo)")
+        columns = {row[1] for row in self._cursor.fetchall()}
+        if "scraped_at" not in columns:
+            self._cursor.execute("alter table AVInfo add column scraped_at text")
+            logger.info("AVInfo 表已添加 scraped_at 列")
+        if "id" not in columns:
+            self._cursor.execute(CREATE_TABLE_SQL.format(table="AVInfo_new"))
+            self._cursor.execute(f"insert into AVInfo_new(id, {', '.join(COLUMNS)}) "
+                                 f"select rowid, {', '.join(COLUMNS)} from AVInfo")
+            self._cursor.execute("drop table AVInfo")
+            self._cursor.execute("alter table AVInfo_new rename to AVInfo")
+            self._cursor.execute("drop table if exists AVSearch")
+            logger.info("AVInfo 表已添加整数主键 id")
+
+    def _rebuild_tags(self):
+        """首次建立标签表时，从已入库的元数据生成标签"""
+        self._info_cursor.execute(f"select {', '.join(COLUMNS)} from AVInfo")
+        rows = [tag for avinfo in self._info_cursor.fetchall() for tag in self._tag_rows(avinfo)]
+        self._cursor.executemany("insert or ignore into AVTag(kind, name, avid) values (?, ?, ?)", rows)
+        logger.info(f"AVTag 表初始化完成，共 {len(rows)} 条")
+
+    def _create_search_index(self) -> int:
+        """
+        建立 FTS5 全文索引 AVSearch（rowid 与 AVInfo 的 id 一致），首次建立时导入已有数据
+        优先使用 trigram 分词（支持中日文子串），SQLite 不支持时退回默认分词
+        :return: 能走索引的最短检索词长度，更短的词用 LIKE 过滤；不支持 FTS5 时返回 0，全部用 LIKE
+        """
+        self._cursor.execute("select sql from sqlite_master where type = 'table' and name = 'AVSearch'")
+        if row := self._cursor.fetchone():
+            return 3 if "trigram" in row[0] else 1
+        columns = ", ".join(SEARCH_COLUMNS)
+        for tokenizer, min_term_length in (("trigram", 3), ("unicode61", 1)):
+            try:
+                self._cursor.execute(f"create virtual table AVSearch using fts5({columns}, tokenize = '{tokenizer}')")
+                break
+            except sql.OperationalError:
+                continue
+        else:
+            logger.warning("当前 SQLite 不支持 FTS5，本地搜索将使用 LIKE 扫描")
+            return 0
+        weights = ", ".join(str(weight) for weight in SEARCH_COLUMNS.values())
+        self._cursor.execute(f"insert into AVSearch(AVSearch, rank) values ('rank', 'bm25({weights})')")
+        self._cursor.execute(f"insert into AVSearch(rowid, {columns}) select id, {columns} from AVInfo")
+        logger.info(f"全文索引初始化完成（{tokenizer} 分词），共 {self._cursor.rowcount} 条")
+        return min_term_length
+
+    def _sync_search(self, avinfos: list[AVInfo]):
+        """在当前事务中按 AVInfo 的 id 覆盖全文索引"""
+        if not self._min_term_length:
+            return
+        columns = ", ".join(SEARCH_COLUMNS)
+        self._cursor.executemany(f"""
+                                 insert or replace into AVSearch(rowid, {columns})
+                                 select id, {columns}
+                                 from AVInfo
+                                 where avid = ?
+                                   and source = ?
+                                 """, [(avinfo.get_avid(), avinfo.get_source()) for avinfo in avinfos])
+
+    @staticmethod
+    def _tag_rows(avinfo: AVInfo) -> list[tuple[str, str, str]]:
+        """拆分演员、类别等逗号分隔的字段，得到 (kind, name, avid) 行"""
+        avid = avinfo.get_avid()
+        values = {
+            "actor": (avinfo.get_actors() or "").split(","),
+            "series": [avinfo.get_series() or ""],
+            "producer": [avinfo.get_producer() or ""],
+            "genre": (avinfo.get_category() or "").split(","),
+        }
+        return list(dict.fromkeys((kind, name.strip(), avid)
+                                  for kind, names in values.items() for name in names if name.strip()))
+
+    def _sync_tags(self, avinfos: list[AVInfo]):
+        """在当前事务中用新数据替换这些 AVID 的标签"""
+        self._cursor.executemany("delete from AVTag where avid = ?", [(avinfo.get_avid(),) for avinfo in avinfos])
+        self._cursor.executemany("insert or ignore into AVTag(kind, name, avid) values (?, ?, ?)",
+                                 [tag for avinfo in avinfos for tag in self._tag_rows(avinfo)])
+
+    @locked
     def get_from_source(self, avid: str, source: Optional[str] = None) -> Optional[AVInfo]:
         if source is None:
-            self._cursor.execute("""
+            self._info_cursor.execute("""
                                  select avid,
                                         title,
                                         source,
@@ -66,12 +182,13 @@ class AVInfoRepo(RepoBase):
                                         series,
                                         category,
                                         actors,
-                                        image_url
+                                        image_url,
+                                        scraped_at
                                  from AVInfo
                                  where avid = ?
                                  """, (avid,))
         else:
-            self._cursor.execute("""
+            self._info_cursor.execute("""
                                  select avid,
                                         title,
                                         source,
@@ -82,62 +199,165 @@ class AVInfoRepo(RepoBase):
                                         series,
                                         category,
                                         actors,
-                                        image_url
+                                        image_url,
+                                        scraped_at
                                  from AVInfo
                                  where avid = ?
                                    and source = ?
                                  """, (avid, source))
 
-        result = self._cursor.fetchone()
-        return AVInfo.generate_from_db(result) if result else None
+        return self._info_cursor.fetchone()
+
+    @locked
+    def get_many(self, avids: list[str]) -> dict[str, AVInfo]:
+        """
+        一次查询取出多个 AVID 的元数据，同一 AVID 有多个来源时取第一条
+        :param avids:
+        :return: avid -> AVInfo，不存在的 AVID 不出现在结果中
+        """
+        if not avids:
+            return {}
+        placeholders = ", ".join("?" * len(avids))
+        self._info_cursor.execute(f"""
+                             select avid,
+                                    title,
+                                    source,
+                                    release_date,
+                                    duration,
+                                    producer,
+                                    publisher,
+                                    series,
+                                    category,
+                                    actors,
+                                    image_url,
+                                    scraped_at
+                             from AVInfo
+                             where avid in ({placeholders})
+                             """, tuple(avids))
+        result: dict[str, AVInfo] = {}
+        for avinfo in self._info_cursor.fetchall():
+            result.setdefault(avinfo.get_avid(), avinfo)
+        return result
+
+    @staticmethod
+    def _to_row(avinfo: AVInfo) -> tuple:
+        return avinfo.to_tuple()
 
+    @locked
     def create_or_update_avinfo(self, avinfo: AVInfo) -> bool:
-        avid = avinfo.get_avid()
-        title = avinfo.get_title()
-        source = avinfo.get_source()
-        duration = avinfo.get_duration()
-        release_date = avinfo.get_release_date()
-        producer = avinfo.get_producer()
-        publisher = avinfo.get_publisher()
-        series = avinfo.get_series()
-        category = avinfo.get_category()
-        actors = avinfo.get_actors()
-        image_url = avinfo.get_image_url()
         try:
-            self._cursor.execute("""
-                                 select avid, source
-                                 from AVInfo
-                                 where avid = ?
-                                   and source = ?
-                                 """, (avinfo.get_avid(), avinfo.get_source()))
-            if self._cursor.fetchone() is None:
-                self._cursor.execute("""
-                                     insert into AVInfo(avid, title, source, release_date, duration,
-                                                        producer, publisher, series, category, actors, image_url)
-                                     values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                                     """, (avid, title, source, release_date, duration,
-                                           producer, publisher, series, category, actors, image_url))
-            else:
-                self._cursor.execute("""
-                                     update AVInfo
-                                     set title        = ?,
-                                         release_date = ?,
-                                         duration     = ?,
-                                         producer     = ?,
-                                         publisher    = ?,
-                                         series       = ?,
-                                         category     = ?,
-                                         actors       = ?,
-                                         image_url    = ?
-                                     where avid = ?
-                                       and source = ?
-                                     """, (title, release_date, duration, producer,
-                                           publisher, series, category, actors, image_url, avid, source))
+            self._cursor.execute(UPSERT_SQL, self._to_row(avinfo))
+            self._sync_tags([avinfo])
+            self._sync_search([avinfo])
             self._database.commit()
-        except sql.OperationalError as e:
+        except sql.Error as e:
+            self._database.rollback()
             logger.error(f"Error in create_or_update_avinfo: {e}")
             return False
         return True
 
+    @locked
+    def bulk_upsert(self, avinfos: list[AVInfo]) -> bool:
+        """在一个事务中写入多条元数据，只提交一次"""
+        if not avinfos:
+            return True
+        try:
+            self._cursor.executemany(UPSERT_SQL, [self._to_row(avinfo) for avinfo in avinfos])
+            self._sync_tags(avinfos)
+            self._sync_search(avinfos)
+            self._database.commit()
+        except sql.Error as e:
+            self._database.rollback()
+            logger.error(f"Error in bulk_upsert: {e}")
+            return False
+        return True
+
+    @locked
+    def get_by_tag(self, kind: str, name: str, limit: int, offset: int = 0) -> tuple[int, list[AVInfo]]:
+        """
+        按标签查找作品，先精确匹配，没有结果时按前缀匹配
+        :return: (总数, 按发行日期从新到旧排列的一页结果)，同一 AVID 只取一条
+        """
+        total, condition, args = 0, "", ()
+        for condition, args in (("name = ?", (name,)), ("name >= ? and name < ?", (name, name + "\U0010ffff"))):
+            self._cursor.execute(f"""
+                                 select count(distinct avid)
+                                 from AVTag
+                                 where kind = ?
+                                   and {condition}
+                                 """, (kind, *args))
+            if total := self._cursor.fetchone()[0]:
+                break
+        if not total:
+            return 0, []
+        self._info_cursor.execute(f"""
+                             select {', '.join(f'i.{column}' for column in COLUMNS)}
+                             from AVInfo i
+                                      join (select distinct avid from AVTag where kind = ? and {condition}) t
+                                           on i.avid = t.avid
+                             group by i.avid
+                             order by i.release_date desc, i.avid
+                             limit ? offset ?
+                             """, (kind, *args, limit, offset))
+        return total, self._info_cursor.fetchall()
+
+    @locked
+    def search(self, keywords: list[str], limit: int, offset: int = 0) -> tuple[int, list[AVInfo]]:
+        """
+        在番号、标题、演员、系列、制作商、类别中检索同时包含所有关键词的作品
+        足够长的关键词走全文索引并按 bm25 排序，过短的关键词（trigram 分词下少于 3 个字）用 LIKE 过滤；
+        全部关键词都过短时按发行日期从新到旧排列
+        :return: (总数, 一页结果)，同一 AVID 只取一条
+        """
+        indexed = [word for word in keywords if self._min_term_length and len(word) >= self._min_term_length]
+        conditions, args = [], []
+        for word in keywords:
+            if word in indexed:
+                continue
+            pattern = "%" + word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            conditions.append("(" + " or ".join(f"i.{column} like ? escape '\\'" for column in SEARCH_COLUMNS) + ")")
+            args.extend([pattern] * len(SEARCH_COLUMNS))
+        where = f"where {' and '.join(conditions)}" if conditions else ""
+        if indexed:
+            match = " ".join('"' + word.replace('"', '""') + '"' for word in indexed)
+            source = """
+                     (select rowid, rank from AVSearch where AVSearch match ?) m
+                         join AVInfo i on i.id = m.rowid
+                     """
+            args = [match, *args]
+            order = "min(m.rank), i.avid"
+        else:
+            source = "AVInfo i"
+            order = "i.release_date desc, i.avid"
+        self._cursor.execute(f"select count(distinct i.avid) from {source} {where}", args)
+        if not (total := self._cursor.fetchone()[0]):
+            return 0, []
+        self._info_cursor.execute(f"""
+                             select {', '.join(f'i.{column}' for column in COLUMNS)}
+                             from {source} {where}
+                             group by i.avid
+                             order by {order}
+                             limit ? offset ?
+                             """, (*args, limit, offset))
+        return total, self._info_cursor.fetchall()
+
+    async def get_from_source_async(self, avid: str, source: Optional[str] = None) -> Optional[AVInfo]:
+        return await self._run(self.get_from_source, avid, source)
+
+    async def get_many_async(self, avids: list[str]) -> dict[str, AVInfo]:
+        return await self._run(self.get_many, avids)
+
+    async def create_or_update_avinfo_async(self, avinfo: AVInfo) -> bool:
+        return await self._run(self.create_or_update_avinfo, avinfo)
+
+    async def get_by_tag_async(self, kind: str, name: str, limit: int, offset: int = 0) -> tuple[int, list[AVInfo]]:
+        return await self._run(self.get_by_tag, kind, name, limit, offset)
+
+    async def search_async(self, keywords: list[str], limit: int, offset: int = 0) -> tuple[int, list[AVInfo]]:
+        return await self._run(self.search, keywords, limit, offset)
+
+    async def bulk_upsert_async(self, avinfos: list[AVInfo]) -> bool:
+        return await self._run(self.bulk_upsert, avinfos)
+
 
 avinfo_repo = AVInfoRepo()
@@ -1,4 +1,4 @@
-from .RepoBase import RepoBase
+from .RepoBase import RepoBase, locked
 from ..model import SourceCookie
 
 import sqlite3 as sql
@@ -19,6 +19,7 @@ class CookieRepo(RepoBase):
         self._cursor.execute(create_table_cmd)
         self._database.commit()
 
+    @locked
     def get_source_cookie(self, source: str) -> SourceCookie | None:
         self._cursor.execute("""
                              SELECT source, cookie, updated_at
@@ -28,34 +29,30 @@ class CookieRepo(RepoBase):
         result = self._cursor.fetchone()
         return SourceCookie().generate_from_db(result) if result else None
 
+    @locked
     def create_or_update_source_cookie(self, source_cookie: SourceCookie) -> bool:
         source = source_cookie.get_source()
         cookie = source_cookie.get_cookie()
         updated_at = source_cookie.get_updated_at()
         try:
             self._cursor.execute("""
-                                 select source, cookie, updated_at
-                                 from source_cookie
-                                 where source = ?
-                                 """, (source,))
-            result = self._cursor.fetchone()
-            if result is None:
-                self._cursor.execute("""
-                                     insert into source_cookie (source, cookie, updated_at)
-                                     values (?, ?, ?)
-                                     """, (source, cookie, updated_at))
-            else:
-                self._cursor.execute("""
-                                     update source_cookie
-                                     set cookie     = ?,
-                                         updated_at = ?
-                                     where source = ?
-                                     """, (cookie, updated_at, source))
+                                 insert into source_cookie (source, cookie, updated_at)
+                                 values (?, ?, ?)
+                                 on conflict (source) do update set cookie     = excluded.cookie,
+                                                                    updated_at = excluded.updated_at
+                                 """, (source, cookie, updated_at))
             self._database.commit()
-        except sql.OperationalError as e:
+        except sql.Error as e:
+            self._database.rollback()
             logger.error(f"Error in create_or_update_source_cookie: {e}")
             return False
         return True
 
+    async def get_source_cookie_async(self, source: str) -> SourceCookie | None:
+        return await self._run(self.get_source_cookie, source)
+
+    async def create_or_update_source_cookie_async(self, source_cookie: SourceCookie) -> bool:
+        return await self._run(self.create_or_update_source_cookie, source_cookie)
+
 
 cookie_repo = CookieRepo()
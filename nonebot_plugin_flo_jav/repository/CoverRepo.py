@@ -0,0 +1,148 @@
+import sqlite3 as sql
+import time
+from typing import Iterable, Optional
+
+from nonebot.log import logger
+
+from .RepoBase import RepoBase, locked
+
+
+class CoverRepo(RepoBase):
+    """
+    封面库的索引：记录每个番号的封面文件摘要（SHA-256）、大小与最近访问时间
+    内容相同的封面共用一个文件，容量按不同的文件计算，超过上限时按文件最近一次被访问的时间淘汰
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._cursor.execute("""
+                             create table if not exists Cover
+                             (
+                                 avid        text primary key,
+                                 digest      text    not null,
+                                 size        integer not null,
+                                 accessed_at real    not null
+                             )
+                             """)
+        self._cursor.execute("""
+                             create index if not exists Cover_digest
+                                 on Cover (digest)
+                             """)
+        self._database.commit()
+        self.total_size: int = self._get_total_size()
+
+    def _get_total_size(self) -> int:
+        self._cursor.execute("""
+                             select coalesce(sum(size), 0)
+                             from (select max(size) as size from Cover group by digest)
+                             """)
+        return self._cursor.fetchone()[0]
+
+    def _is_referenced(self, digest: str) -> bool:
+        self._cursor.execute("select 1 from Cover where digest = ? limit 1", (digest,))
+        return self._cursor.fetchone() is not None
+
+    @locked
+    def get(self, avid: str) -> Optional[tuple[str, int]]:
+        """:return: (封面文件的摘要, 文件大小)，没有记录时返回 None"""
+        self._cursor.execute("select digest, size from Cover where avid = ?", (avid,))
+        if (row := self._cursor.fetchone()) is None:
+            return None
+        self._cursor.execute("update Cover set accessed_at = ? where avid = ?", (time.time(), avid))
+        self._database.commit()
+        return row
+
+    @locked
+    def touch_many(self, accesses: Iterable[tuple[str, float]]):
+        """批量写入最近访问时间：[(avid, accessed_at), ...]"""
+        self._cursor.executemany("update Cover set accessed_at = max(accessed_at, ?) where avid = ?",
+                                 [(accessed_at, avid) for avid, accessed_at in accesses])
+        self._database.commit()
+
+    @locked
+    def put(self, avid: str, digest: str, size: int, max_size: int = 0) -> list[str]:
+        """
+        记录番号的封面，总大小超过 max_size 字节时淘汰最久未访问的封面（max_size 为 0 时不限）
+        :return: 不再被任何番号引用、应删除文件的摘要（被替换的旧封面与被淘汰的封面）
+        """
+        removed = []
+        try:
+            self._cursor.execute("select digest, size from Cover where avid = ?", (avid,))
+            old = self._cursor.fetchone()
+            if not self._is_referenced(digest):
+                self.total_size += size
+            self._cursor.execute("""
+                                 insert into Cover(avid, digest, size, accessed_at)
+                                 values (?, ?, ?, ?)
+                                 on conflict (avid) do update set digest      = excluded.digest,
+                                                                  size        = excluded.size,
+                                                                  accessed_at = excluded.accessed_at
+                                 """, (avid, digest, size, time.time()))
+            if old is not None and old[0] != digest and not self._is_referenced(old[0]):
+                self.total_size -= old[1]
+                removed.append(old[0])
+            if max_size and self.total_size > max_size:
+                removed.extend(self._evict(max_size, digest))
+            self._database.commit()
+        except sql.Error as e:
+            self._database.rollback()
+            self.total_size = self._get_total_size()
+            logger.error(f"Error in put: {e}")
+            return []
+        return removed
+
+    def _evict(self, max_size: int, keep: str) -> list[str]:
+        """按最近访问时间从旧到新删除封面，直到总大小降到 max_size 的九成以下，刚写入的 keep 不淘汰"""
+        target = max_size * 0.9
+        self._cursor.execute("""
+                             select digest, max(size), max(accessed_at) as last_access
+                             from Cover
+                             group by digest
+                             order by last_access
+                             """)
+        evicted = []
+        for digest, size, _ in self._cursor.fetchall():
+            if self.total_size <= target:
+                break
+            if digest != keep:
+                evicted.append(digest)
+                self.total_size -= size
+        self._cursor.executemany("delete from Cover where digest = ?", [(digest,) for digest in evicted])
+        logger.info(f"封面库淘汰 {len(evicted)} 个文件")
+        return evicted
+
+    @locked
+    def shrink(self, max_size: int) -> list[str]:
+        """按上限淘汰封面（如调小了上限），返回被淘汰的摘要"""
+        evicted = self._evict(max_size, "")
+        self._database.commit()
+        return evicted
+
+    @locked
+    def remove_digests(self, digests: Iterable[str]) -> int:
+        """删除引用这些文件的记录（文件损坏或已丢失），返回删除的记录数"""
+        self._cursor.executemany("delete from Cover where digest = ?", [(digest,) for digest in digests])
+        count = self._cursor.rowcount
+        self._database.commit()
+        self.total_size = self._get_total_size()
+        return count
+
+    @locked
+    def get_digests(self) -> set[str]:
+        self._cursor.execute("select distinct digest from Cover")
+        return {row[0] for row in self._cursor.fetchall()}
+
+    async def get_async(self, avid: str) -> Optional[tuple[str, int]]:
+        return await self._run(self.get, avid)
+
+    async def touch_many_async(self, accesses: Iterable[tuple[str, float]]):
+        return await self._run(self.touch_many, accesses)
+
+    async def put_async(self, avid: str, digest: str, size: int, max_size: int = 0) -> list[str]:
+        return await self._run(self.put, avid, digest, size, max_size)
+
+    async def remove_digests_async(self, digests: Iterable[str]) -> int:
+        return await self._run(self.remove_digests, digests)
+
+
+cover_repo = CoverRepo()
@@ -0,0 +1,63 @@
+import sqlite3 as sql
+from datetime import datetime
+from typing import Optional
+
+from nonebot.log import logger
+
+from .RepoBase import RepoBase, locked
+
+
+class CrawlCursorRepo(RepoBase):
+    """
+    后台预取的断点：记录每个爬取任务走到了第几个目标的第几页，重启后从断点继续
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._cursor.execute("""
+                             create table if not exists CrawlCursor
+                             (
+                                 name       text primary key,
+                                 target     integer not null,
+                                 page       integer not null,
+                                 updated_at text    not null
+                             )
+                             """)
+        self._database.commit()
+
+    @locked
+    def get(self, name: str) -> Optional[tuple[int, int]]:
+        """:return: (目标序号, 页码)，没有记录时返回 None"""
+        self._cursor.execute("""
+                             select target, page
+                             from CrawlCursor
+                             where name = ?
+                             """, (name,))
+        if (row := self._cursor.fetchone()) is None:
+            return None
+        return row[0], row[1]
+
+    @locked
+    def save(self, name: str, target: int, page: int) -> bool:
+        try:
+            self._cursor.execute("""
+                                 insert into CrawlCursor(name, target, page, updated_at)
+                                 values (?, ?, ?, ?)
+                                 on conflict (name) do update set target     = excluded.target,
+                                                                  page       = excluded.page,
+                                                                  updated_at = excluded.updated_at
+                                 """, (name, target, page, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+            self._database.commit()
+        except sql.OperationalError as e:
+            logger.error(f"Error in save: {e}")
+            return False
+        return True
+
+    async def get_async(self, name: str) -> Optional[tuple[int, int]]:
+        return await self._run(self.get, name)
+
+    async def save_async(self, name: str, target: int, page: int) -> bool:
+        return await self._run(self.save, name, target, page)
+
+
+crawl_cursor_repo = CrawlCursorRepo()
@@ -0,0 +1,136 @@
+import sqlite3 as sql
+import time
+from typing import Optional
+
+from nonebot.log import logger
+
+from .RepoBase import RepoBase, locked
+
+
+class PageCacheRepo(RepoBase):
+    """
+    页面缓存的存储：以 URL 为键保存压缩后的页面与 ETag / Last-Modified，
+    超过容量上限时按最近访问时间淘汰
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._cursor.execute("""
+                             create table if not exists PageCache
+                             (
+                                 url           text primary key,
+                                 avid          text,
+                                 source        text,
+                                 etag          text,
+                                 last_modified text,
+                                 fetched_at    real    not null,
+                                 accessed_at   real    not null,
+                                 size          integer not null,
+                                 body          blob    not null
+                             )
+                             """)
+        self._cursor.execute("""
+                             create index if not exists PageCache_accessed_at
+                                 on PageCache (accessed_at)
+                             """)
+        self._database.commit()
+        self._cursor.execute("select coalesce(sum(size), 0) from PageCache")
+        self.total_size: int = self._cursor.fetchone()[0]
+
+    @locked
+    def get(self, url: str) -> Optional[tuple[Optional[str], Optional[str], float, bytes]]:
+        """:return: (etag, last_modified, fetched_at, 压缩的页面)，没有缓存时返回 None"""
+        self._cursor.execute("""
+                             select etag, last_modified, fetched_at, body
+                             from PageCache
+                             where url = ?
+                             """, (url,))
+        if (row := self._cursor.fetchone()) is None:
+            return None
+        self._cursor.execute("update PageCache set accessed_at = ? where url = ?", (time.time(), url))
+        self._database.commit()
+        return row
+
+    @locked
+    def put(self, url: str, avid: Optional[str], source: Optional[str], etag: Optional[str],
+            last_modified: Optional[str], body: bytes, max_size: int) -> bool:
+        """保存页面，总大小超过 max_size 字节时淘汰最久未访问的页面"""
+        now = time.time()
+        try:
+            self._cursor.execute("select size from PageCache where url = ?", (url,))
+            old_size = row[0] if (row := self._cursor.fetchone()) else 0
+            self._cursor.execute("""
+                                 insert into PageCache(url, avid, source, etag, last_modified,
+                                                       fetched_at, accessed_at, size, body)
+                                 values (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                                 on conflict (url) do update set avid          = excluded.avid,
+                                                                 source        = excluded.source,
+                                                                 etag          = excluded.etag,
+                                                                 last_modified = excluded.last_modified,
+                                                                 fetched_at    = excluded.fetched_at,
+                                                                 accessed_at   = excluded.accessed_at,
+                                                                 size          = excluded.size,
+                                                                 body          = excluded.body
+                                 """, (url, avid, source, etag, last_modified, now, now, len(body), body))
+            self.total_size += len(body) - old_size
+            if self.total_size > max_size:
+                self._evict(max_size)
+            self._database.commit()
+        except sql.Error as e:
+            self._database.rollback()
+            logger.error(f"Error in put: {e}")
+            return False
+        return True
+
+    def _evict(self, max_size: int):
+        """按最近访问时间从旧到新删除页面，直到总大小降到 max_size 的九成以下"""
+        target = max_size * 0.9
+        self._cursor.execute("select url, size from PageCache order by accessed_at")
+        evicted = []
+        for url, size in self._cursor.fetchall():
+            if self.total_size <= target:
+                break
+            evicted.append((url,))
+            self.total_size -= size
+        self._cursor.executemany("delete from PageCache where url = ?", evicted)
+        logger.info(f"页面缓存淘汰 {len(evicted)} 个页面")
+
+    @locked
+    def touch(self, url: str) -> bool:
+        """页面经验证未改变（304），刷新抓取时间"""
+        now = time.time()
+        self._cursor.execute("update PageCache set fetched_at = ?, accessed_at = ? where url = ?", (now, now, url))
+        self._database.commit()
+        return True
+
+    @locked
+    def get_pages(self, after: int, limit: int) -> list[tuple[int, str, str, float, bytes]]:
+        """
+        按 rowid 顺序分批取出带番号的详情页，用于离线重新解析
+        :return: [(rowid, avid, source, fetched_at, 压缩的页面), ...]
+        """
+        self._cursor.execute("""
+                             select rowid, avid, source, fetched_at, body
+                             from PageCache
+                             where rowid > ?
+                               and avid is not null
+                             order by rowid
+                             limit ?
+                             """, (after, limit))
+        return self._cursor.fetchall()
+
+    async def get_async(self, url: str) -> Optional[tuple[Optional[str], Optional[str], float, bytes]]:
+        return await self._run(self.get, url)
+
+    async def put_async(self, url: str, avid: Optional[str], source: Optional[str], etag: Optional[str],
+                        last_modified: Optional[str], body: bytes, max_size: int) -> bool:
+        return await self._run(self.put, url, avid, source, etag, last_modified, body, max_size)
+
+    async def touch_async(self, url: str) -> bool:
+        return await self._run(self.touch, url)
+
+    async def get_pages_async(self, after: int, limit: int) -> list[tuple[int, str, str, float, bytes]]:
+        return await self._run(self.get_pages, after, limit)
+
+
+page_cache_repo = PageCacheRepo()
@@ -1,13 +1,53 @@
+import asyncio
+import functools
 import sqlite3 as sql
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 
 from ..config import database_file
 
 
+def locked(func):
+    """同步方法装饰器：持有连接锁执行，保证事件循环线程与数据库线程不会同时使用同一连接"""
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return func(self, *args, **kwargs)
+
+    return wrapper
+
+
 class RepoBase:
+    # 所有仓库共用的数据库线程，异步接口的读写都排队在这个线程上执行
+    _executor: Optional[ThreadPoolExecutor] = None
+
     def __init__(self):
-        self._database = sql.connect(database_file)
+        self._database = sql.connect(database_file, check_same_thread=False)
+        self._database.execute("pragma journal_mode = wal")
+        self._database.execute("pragma synchronous = normal")
         self._cursor = self._database.cursor()
+        self._lock = threading.RLock()
 
     def __del__(self):
         self._cursor.close()
         self._database.close()
+
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        if RepoBase._executor is None:
+            RepoBase._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="flo_jav_db")
+        return RepoBase._executor
+
+    @classmethod
+    def shutdown(cls):
+        """等待数据库线程处理完剩余请求后退出"""
+        if RepoBase._executor is not None:
+            executor, RepoBase._executor = RepoBase._executor, None
+            executor.shutdown(wait=True)
+
+    async def _run(self, func, *args):
+        """在数据库线程上执行同步方法，不阻塞事件循环"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), functools.partial(func, *args))
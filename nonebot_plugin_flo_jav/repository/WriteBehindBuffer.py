@@ -0,0 +1,83 @@
+import asyncio
+from typing import Optional
+
+from nonebot.log import logger
+
+from .AVInfoRepo import AVInfoRepo
+from ..model import AVInfo
+from ..utils import metrics
+
+
+class WriteBehindBuffer:
+    """
+    AVInfo 写缓冲：并发到达的写入先暂存，delay 秒内（或攒够 max_batch 条时）合并为一次 bulk_upsert，
+    即一个事务、一次提交；同一 (avid, source) 在一批内只写最后一次
+    """
+
+    def __init__(self, repo: AVInfoRepo, delay: float = 0.05, max_batch: int = 100):
+        self.repo = repo
+        self.delay = delay
+        self.max_batch = max(1, max_batch)
+        self._pending: dict[tuple[str, str], AVInfo] = {}
+        self._waiters: list[asyncio.Future] = []
+        # 已提交写入但尚未落盘的数据，avid -> AVInfo，供读取时兜底
+        self._unsaved: dict[str, AVInfo] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._writes: set[asyncio.Task] = set()
+
+    def submit(self, avinfo: AVInfo) -> asyncio.Future:
+        """
+        暂存一条写入，立即返回
+        :return: 该批写入完成后得到 是否成功 的 Future，需要确认落盘时可以 await
+        """
+        loop = asyncio.get_running_loop()
+        self._pending[(avinfo.get_avid(), avinfo.get_source())] = avinfo
+        self._unsaved[avinfo.get_avid()] = avinfo
+        future = loop.create_future()
+        self._waiters.append(future)
+        if len(self._pending) >= self.max_batch or self.delay <= 0:
+            self._start_write()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.delay, self._start_write)
+        return future
+
+    def get(self, avid: str) -> Optional[AVInfo]:
+        """取出尚未落盘的元数据"""
+        return self._unsaved.get(avid)
+
+    async def flush(self):
+        """立即写入暂存的数据，并等待所有进行中的写入完成"""
+        self._start_write()
+        while self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+
+    async def close(self):
+        await self.flush()
+
+    def _start_write(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        avinfos, waiters = list(self._pending.values()), self._waiters
+        self._pending, self._waiters = {}, []
+        task = asyncio.get_running_loop().create_task(self._write(avinfos, waiters))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    async def _write(self, avinfos: list[AVInfo], waiters: list[asyncio.Future]):
+        success = False
+        try:
+            with metrics.span("sqlite_write"):
+                success = await self.repo.bulk_upsert_async(avinfos)
+            metrics.inc("rows_written_total", len(avinfos))
+        except Exception as e:
+            logger.error(f"批量写入 AVInfo 失败: {e}")
+        finally:
+            for avinfo in avinfos:
+                if self._unsaved.get(avinfo.get_avid()) is avinfo:
+                    del self._unsaved[avinfo.get_avid()]
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(success)
@@ -1,7 +1,17 @@
 from .RepoBase import RepoBase
 from .CookieRepo import CookieRepo
+from .AVIndexRepo import AVIndexRepo
+from .CrawlCursorRepo import CrawlCursorRepo
+from .WriteBehindBuffer import WriteBehindBuffer
+from .PageCacheRepo import PageCacheRepo
+from .CoverRepo import CoverRepo
 
 __all__ = [
     "RepoBase",
     "CookieRepo",
+    "AVIndexRepo",
+    "CrawlCursorRepo",
+    "WriteBehindBuffer",
+    "PageCacheRepo",
+    "CoverRepo",
 ]
@@ -2,18 +2,51 @@
 JavBus 风格刮削器 - 适用于 JavBus 及其镜像站（Busdmm, Dmmsee 等）
 """
 import re
-from typing import Optional
+from typing import List, Optional
 
 from nonebot.log import logger
 
-from .ScraperBase import ScraperBase
+from .ScraperBase import ScraperBase, NotFoundError
+
+META_DESCRIPTION_PATTERN = re.compile(r'<meta\s+name="description"\s+content="([^"]+)"')
+META_DATE_PATTERN = re.compile(r'【發行日期】(\d{4}-\d{2}-\d{2})')
+META_DURATION_PATTERN = re.compile(r'【長度】(\d+)分鐘')
+TITLE_TAG_PATTERN = re.compile(r'<title>([^<]+)</title>')
+TITLE_SITE_SUFFIX_PATTERN = re.compile(r'\s*[-|]\s*JavBus.*$', re.IGNORECASE)
+HEADER_DATE_PATTERN = re.compile(r'(\d{4}-\d{2}-\d{2})')
+HEADER_DURATION_PATTERN = re.compile(r'(\d+)分鐘')
+# 列表页中的作品卡片
+MOVIE_BOX_PATTERN = re.compile(r'<a class="movie-box"[^>]*href="[^"]*/([A-Za-z]+-\d+)"')
+
+# 正文中需要的所有字段合并为一个模式，按命中的分组区分字段
+BODY_PATTERN = re.compile(
+    r'<(?:'
+    r'span class="header">(?P<header_name>[^<:]+):</span>\s*'
+    r'(?:<a[^>]*>(?P<header_link>[^<]+)</a>|(?P<header_text>[^<\s][^<]*))'
+    r'|span class="genre"><label><input[^>]*><a[^>]*>(?P<genre>[^<]+)</a></label></span>'
+    r'|a class="avatar-box"[^>]*>\s*<div[^>]*>\s*<img[^>]*>\s*</div>\s*<span>(?P<actor>[^<]+)</span>'
+    r'|a class="bigImage"[^>]*href="(?P<image>[^"]+)"'
+    r')'
+)
+
+# 信息栏标题 -> 元数据字段
+HEADER_FIELDS = {
+    '製作商': 'producer',
+    '發行商': 'publisher',
+    '系列': 'series',
+    '導演': 'director',
+}
+
+# 过滤掉一些技术性标签
+IGNORED_CATEGORIES = frozenset(['フルハイビジョン(FHD)', 'MGSだけのおまけ映像付き'])
 
 
 class Javbus(ScraperBase):
     """JavBus 刮削器"""
 
-    def __init__(self, proxy: Optional[str] = None, timeout: int = 15):
-        super().__init__(proxy, timeout)
+    def __init__(self, proxy: Optional[str] = None, timeout: int = 15, max_connections: int = 10,
+                 max_image_size: int = 10 * 1024 * 1024):
+        super().__init__(proxy, timeout, max_connections, max_image_size)
         self.domain = "www.javbus.com"
 
     def get_scraper_name(self) -> str:
@@ -21,12 +54,32 @@ class Javbus(ScraperBase):
 
     async def get_html(self, avid: str) -> Optional[str]:
         url = f"https://{self.domain}/{avid.upper()}"
-        return await self.fetch_html(url)
+        return await self.fetch_html(url, avid.upper())
+
+    async def get_listing(self, page: int, prefix: Optional[str] = None) -> Optional[List[str]]:
+        """最新发行为 /page/N，按前缀搜索为 /search/PREFIX/N"""
+        path = f"/search/{prefix}/{page}" if prefix else f"/page/{page}"
+        try:
+            html = await self.fetch_html(f"https://{self.domain}{path}")
+        except NotFoundError:
+            return []
+        if html is None:
+            return None
+        return self.parse_listing(html)
+
+    @staticmethod
+    def parse_listing(html: str) -> List[str]:
+        """提取列表页上作品卡片的番号（去重并保持页面顺序）"""
+        return list(dict.fromkeys(match.group(1).upper() for match in MOVIE_BOX_PATTERN.finditer(html)))
 
     def parse_html(self, avid: str, html: str) -> Optional[dict]:
-        """解析 JavBus 风格的 HTML 获取元数据"""
+        """
+        解析 JavBus 风格的 HTML 获取元数据
+        meta 与 <title> 只在 <head> 中查找，其余字段由 BODY_PATTERN 对正文做一次扫描得到
+        """
+        avid = avid.upper()
         scrape_data = {
-            'avid': avid.upper(),
+            'avid': avid,
             'title': '',
             'source': self.get_scraper_name(),
             'release_date': '',
@@ -40,89 +93,63 @@ class Javbus(ScraperBase):
         }
 
         try:
+            head_end = html.find('</head>')
+            head, body = (html[:head_end], html[head_end:]) if head_end != -1 else (html, html)
+
             # 从 meta description 提取基本信息
             # 格式: 【發行日期】2025-12-19，【長度】160分鐘，(ABF-296)「標題...」
-            meta_match = re.search(r'<meta\s+name="description"\s+content="([^"]+)"', html)
-            if meta_match:
+            if meta_match := META_DESCRIPTION_PATTERN.search(head):
                 desc = meta_match.group(1)
-
-                # 提取发行日期
-                date_match = re.search(r'【發行日期】(\d{4}-\d{2}-\d{2})', desc)
-                if date_match:
+                if date_match := META_DATE_PATTERN.search(desc):
                     scrape_data['release_date'] = date_match.group(1)
-
-                # 提取时长
-                duration_match = re.search(r'【長度】(\d+)分鐘', desc)
-                if duration_match:
+                if duration_match := META_DURATION_PATTERN.search(desc):
                     scrape_data['duration'] = duration_match.group(1) + "分钟"
-
                 # 提取标题 - (AVID)后面的内容
-                title_match = re.search(rf'\({avid}\)(.+?)$', desc)
-                if title_match:
-                    scrape_data['title'] = title_match.group(1).strip()
-
-            # 从页面内容提取发行日期（如果 meta 中没有）
+                if (index := desc.find(f'({avid})')) != -1 and (title := desc[index + len(avid) + 2:].strip()):
+                    scrape_data['title'] = title
+
+            # 单次扫描正文：信息栏字段、类别、演员、封面
+            headers: dict[str, str] = {}
+            categories: list[str] = []
+            actors: list[str] = []
+            image_path = ''
+            for match in BODY_PATTERN.finditer(body):
+                kind = match.lastgroup
+                if kind == 'header_link' or kind == 'header_text':
+                    headers.setdefault(match.group('header_name'), match.group(kind))
+                elif kind == 'genre':
+                    if match.group('genre') not in IGNORED_CATEGORIES:
+                        categories.append(match.group('genre'))
+                elif kind == 'actor':
+                    actors.append(match.group('actor'))
+                elif kind == 'image' and not image_path:
+                    image_path = match.group('image')
+
+            # 从页面内容提取发行日期与时长（如果 meta 中没有）
             if not scrape_data['release_date']:
-                release_match = re.search(r'<span class="header">發行日期:</span>\s*(\d{4}-\d{2}-\d{2})', html)
-                if release_match:
+                if release_match := HEADER_DATE_PATTERN.match(headers.get('發行日期', '')):
                     scrape_data['release_date'] = release_match.group(1)
-
-            # 从页面内容提取时长（如果 meta 中没有）
             if not scrape_data['duration']:
-                duration_match = re.search(r'<span class="header">長度:</span>\s*(\d+)分鐘', html)
-                if duration_match:
+                if duration_match := HEADER_DURATION_PATTERN.match(headers.get('長度', '')):
                     scrape_data['duration'] = duration_match.group(1) + "分钟"
 
             # 从页面标题提取标题（作为备选）
-            title_tag_match = re.search(r'<title>([^<]+)</title>', html)
-            if title_tag_match:
-                title = title_tag_match.group(1)
-                # 移除网站名称后缀
-                title = re.sub(r'\s*[-|]\s*JavBus.*$', '', title, flags=re.IGNORECASE)
-                # 移除 AVID 前缀
-                title = re.sub(rf'^{avid}\s*', '', title, flags=re.IGNORECASE)
+            if title_tag_match := TITLE_TAG_PATTERN.search(head):
+                # 移除网站名称后缀与 AVID 前缀
+                title = TITLE_SITE_SUFFIX_PATTERN.sub('', title_tag_match.group(1))
+                if title[:len(avid)].upper() == avid:
+                    title = title[len(avid):]
                 scrape_data['title'] = title.strip()
 
-            # 提取製作商（producer）
-            producer_match = re.search(r'<span class="header">製作商:</span>\s*<a[^>]*>([^<]+)</a>', html)
-            if producer_match:
-                scrape_data['producer'] = producer_match.group(1).strip()
-
-            # 提取發行商（publisher）
-            publisher_match = re.search(r'<span class="header">發行商:</span>\s*<a[^>]*>([^<]+)</a>', html)
-            if publisher_match:
-                scrape_data['publisher'] = publisher_match.group(1).strip()
-
-            # 提取系列（series）
-            series_match = re.search(r'<span class="header">系列:</span>\s*<a[^>]*>([^<]+)</a>', html)
-            if series_match:
-                scrape_data['series'] = series_match.group(1).strip()
-
-            # 提取類別（categories）
-            category_matches = re.findall(r'<span class="genre"><label><input[^>]*><a[^>]*>([^<]+)</a></label></span>',
-                                          html)
-            if category_matches:
-                # 过滤掉一些技术性标签
-                filtered_categories = [cat for cat in category_matches if
-                                       cat not in ['フルハイビジョン(FHD)', 'MGSだけのおまけ映像付き']]
-                scrape_data['category'] = ', '.join(filtered_categories)
-
-            # 提取導演（director）
-            director_match = re.search(r'<span class="header">導演:</span>\s*<a[^>]*>([^<]+)</a>', html)
-            if director_match:
-                scrape_data['director'] = director_match.group(1).strip()
-
-            # 提取演員（actors）
-            # 查找所有演员链接
-            actor_matches = re.findall(r'<a class="avatar-box"[^>]*>\s*<div[^>]*>\s*'
-                                       r'<img[^>]*>\s*</div>\s*<span>([^<]+)</span>', html)
-            if actor_matches:
-                scrape_data['actors'] = ', '.join(actor_matches)
-
-            # 提取封面图片
-            image_match = re.search(r'<a class="bigImage"[^>]*href="([^"]+)"', html)
-            if image_match:
-                scrape_data['image_url'] = f"https://{self.domain}{image_match.group(1)}"
+            for header, key in HEADER_FIELDS.items():
+                if value := headers.get(header, '').strip():
+                    scrape_data[key] = value
+            if categories:
+                scrape_data['category'] = ', '.join(categories)
+            if actors:
+                scrape_data['actors'] = ', '.join(actors)
+            if image_path:
+                scrape_data['image_url'] = f"https://{self.domain}{image_path}"
 
             return scrape_data
 
@@ -134,8 +161,9 @@ class Javbus(ScraperBase):
 class Busdmm(Javbus):
     """Busdmm 刮削器 - JavBus 镜像站"""
 
-    def __init__(self, proxy: Optional[str] = None, timeout: int = 15):
-        super().__init__(proxy, timeout)
+    def __init__(self, proxy: Optional[str] = None, timeout: int = 15, max_connections: int = 10,
+                 max_image_size: int = 10 * 1024 * 1024):
+        super().__init__(proxy, timeout, max_connections, max_image_size)
         self.domain = "www.busdmm.ink"
 
     def get_scraper_name(self) -> str:
@@ -145,8 +173,9 @@ class Busdmm(Javbus):
 class Dmmsee(Javbus):
     """Dmmsee 刮削器 - JavBus 镜像站"""
 
-    def __init__(self, proxy: Optional[str] = None, timeout: int = 15):
-        super().__init__(proxy, timeout)
+    def __init__(self, proxy: Optional[str] = None, timeout: int = 15, max_connections: int = 10,
+                 max_image_size: int = 10 * 1024 * 1024):
+        super().__init__(proxy, timeout, max_connections, max_image_size)
         self.domain = "www.dmmsee.bond"
 
     def get_scraper_name(self) -> str:
@@ -0,0 +1,75 @@
+"""
+镜像健康状态 - 记录每个镜像的滚动延迟、错误率与 HTTP 状态，并提供熔断器
+"""
+import time
+from collections import Counter, deque
+from typing import Optional
+
+
+class MirrorHealth:
+    """单个镜像的健康状态"""
+
+    # 没有成功样本时假定的延迟（秒）
+    DEFAULT_LATENCY = 1.0
+
+    def __init__(self, window: int = 20, failure_threshold: int = 3, cooldown: float = 300):
+        """
+        :param window: 统计延迟与错误率的最近请求数
+        :param failure_threshold: 连续失败多少次后熔断
+        :param cooldown: 熔断持续时间（秒），之后放行请求试探，再失败则重新熔断
+        """
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.outcomes: deque[bool] = deque(maxlen=window)
+        self.status_counts: Counter[str] = Counter()
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+
+    @staticmethod
+    def is_failure_status(status: int) -> bool:
+        """403/429/5xx 等说明镜像不可用；404 只说明番号不存在，镜像本身是好的"""
+        return status >= 400 and status != 404
+
+    def record(self, latency: float, status: Optional[int]):
+        """
+        记录一次请求结果
+        :param latency: 耗时（秒）
+        :param status: HTTP 状态码，网络错误或超时为 None
+        """
+        ok = status is not None and not self.is_failure_status(status)
+        self.outcomes.append(ok)
+        self.status_counts[str(status) if status is not None else "error"] += 1
+        if ok:
+            self.latencies.append(latency)
+            self.consecutive_failures = 0
+            self.open_until = 0.0
+        else:
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.failure_threshold:
+                self.open_until = time.monotonic() + self.cooldown
+
+    def is_open(self) -> bool:
+        """熔断中（冷却期内跳过该镜像）"""
+        return time.monotonic() < self.open_until
+
+    def get_latency(self) -> float:
+        return sum(self.latencies) / len(self.latencies) if self.latencies else self.DEFAULT_LATENCY
+
+    def get_success_rate(self) -> float:
+        """平滑后的成功率，样本少时趋近 0.5 而不是 0 或 1"""
+        return (sum(self.outcomes) + 1) / (len(self.outcomes) + 2)
+
+    def get_score(self) -> float:
+        """按成功率加权的延迟，越小越优先"""
+        return self.get_latency() / self.get_success_rate()
+
+    def snapshot(self) -> dict:
+        return {
+            "latency": round(self.get_latency(), 3),
+            "success_rate": round(self.get_success_rate(), 3),
+            "requests": len(self.outcomes),
+            "consecutive_failures": self.consecutive_failures,
+            "open": self.is_open(),
+            "status": dict(self.status_counts),
+        }
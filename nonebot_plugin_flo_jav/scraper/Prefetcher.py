@@ -0,0 +1,104 @@
+"""
+后台预取 - 在低峰时段遍历镜像的列表页（最新发行与各常见前缀），把尚未入库的作品提前刮削入库并下载封面
+"""
+import asyncio
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from nonebot.log import logger
+
+from .ScraperManager import ScraperManager
+from ..constants import POSSIBLE_PREFIX
+from ..repository.AVInfoRepo import avinfo_repo
+from ..repository.CrawlCursorRepo import crawl_cursor_repo
+
+
+def parse_hours(hours: str) -> Optional[Tuple[int, int]]:
+    """
+    解析 "起始-结束" 形式的小时区间（结束不含，可跨午夜，如 "22-6"）
+    为空时返回 None，表示不限时段
+    """
+    if not hours.strip():
+        return None
+    start, end = (int(hour) % 24 for hour in hours.split("-", 1))
+    return start, end
+
+
+class Prefetcher:
+    """
+    列表页预取
+    依次遍历 最新发行 与 POSSIBLE_PREFIX 中各前缀的搜索结果，每个目标最多 max_pages 页；
+    某页上的作品全部已入库时视为追上了之前的进度，直接转到下一个目标，走完最后一个目标后从头开始
+    遍历位置保存在数据库中，重启后从断点继续
+    """
+    CURSOR_NAME = "prefetch"
+
+    def __init__(self,
+                 manager: ScraperManager,
+                 budget: int = 40,
+                 concurrency: int = 2,
+                 max_pages: int = 3,
+                 hours: str = ""):
+        """
+        :param budget: 每轮最多发出的页面请求数（列表页与详情页合计，封面下载不计）
+        :param concurrency: 同时刮削的详情页数
+        :param max_pages: 每个目标最多遍历的列表页数
+        :param hours: 允许运行的时段，见 parse_hours
+        """
+        self.manager = manager
+        self.budget = budget
+        self.concurrency = max(1, concurrency)
+        self.max_pages = max(1, max_pages)
+        self.hours = parse_hours(hours)
+        # None 表示最新发行
+        self.targets: List[Optional[str]] = [None, *POSSIBLE_PREFIX]
+
+    def is_off_peak(self) -> bool:
+        """当前是否处于允许运行的时段"""
+        if self.hours is None:
+            return True
+        start, end = self.hours
+        hour = datetime.now().hour
+        return start <= hour < end if start <= end else hour >= start or hour < end
+
+    async def crawl(self) -> int:
+        """
+        执行一轮预取
+        :return: 新入库的作品数
+        """
+        target, page = await crawl_cursor_repo.get_async(self.CURSOR_NAME) or (0, 1)
+        target %= len(self.targets)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        requests = stored = 0
+
+        while requests < self.budget:
+            scraper = self.manager.get_scrapers()[0][1]
+            prefix = self.targets[target]
+            avids = await scraper.get_listing(page, prefix)
+            requests += 1
+            if avids is None:
+                # 镜像暂时不可用，下一轮从同一位置继续
+                break
+
+            known = await avinfo_repo.get_many_async(avids) if avids else {}
+            pending = [avid for avid in avids if avid not in known]
+            batch = pending[:self.budget - requests]
+
+            async def fetch(avid: str) -> bool:
+                async with semaphore:
+                    return await self.manager.prefetch(avid, scraper)
+
+            results = await asyncio.gather(*(fetch(avid) for avid in batch), return_exceptions=True)
+            requests += len(batch)
+            stored += sum(result is True for result in results)
+
+            # 预算用完时本页剩余的作品留到下一轮，停在本页
+            if len(batch) == len(pending):
+                if not pending or page >= self.max_pages:
+                    target, page = (target + 1) % len(self.targets), 1
+                else:
+                    page += 1
+            await crawl_cursor_repo.save_async(self.CURSOR_NAME, target, page)
+
+        logger.info(f"后台预取完成，请求 {requests} 个页面，新入库 {stored} 部作品")
+        return stored
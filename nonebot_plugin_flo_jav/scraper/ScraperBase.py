@@ -1,24 +1,54 @@
 """
 Scraper 基类 - 定义刮削器的通用接口和方法
 """
-from typing import Optional
+import asyncio
+import hashlib
+import os
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import List, Optional
 
 from curl_cffi import requests
 from pathlib import Path
 from nonebot.log import logger
 
 from ..model import AVInfo
+from ..cache.PageCache import PageCache
 from ..constants import HEADERS, IMPERSONATE
+from ..utils import sniff_image_format, is_complete, SingleFlight, TokenBucketScheduler, metrics
+from .MirrorHealth import MirrorHealth
+from .SessionCookies import SessionCookies
+
+
+# 年龄确认、Cloudflare 质询等拦截页的状态码，遇到时刷新 Cookie 后重试一次
+CHALLENGE_STATUS = (403, 503)
+
+
+class NotFoundError(Exception):
+    """页面不存在（HTTP 404），即该镜像确认没有这个番号"""
 
 
 class ScraperBase:
     """刮削器基类"""
 
-    def __init__(self, proxy: Optional[str] = None, timeout: int = 15):
+    def __init__(self, proxy: Optional[str] = None, timeout: int = 15, max_connections: int = 10,
+                 max_image_size: int = 10 * 1024 * 1024):
         self.proxy = proxy
         self.proxies = {'http': proxy, 'https': proxy} if proxy else None
         self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_image_size = max_image_size
         self.domain = ""
+        self.health = MirrorHealth()
+        # 该镜像域名的请求调度器，页面与封面请求共用，默认不限速
+        self.scheduler = TokenBucketScheduler()
+        # 详情页磁盘缓存，由管理器设置，为 None 时不缓存
+        self.page_cache: Optional[PageCache] = None
+        # 持久化的会话 Cookie，刷新操作同时只执行一次
+        self.cookies = SessionCookies(self.get_scraper_name())
+        self._cookie_refresh = SingleFlight()
+        self._session: Optional[requests.AsyncSession] = None
 
     def set_domain(self, domain: str):
         """设置域名"""
@@ -27,6 +57,76 @@ class ScraperBase:
     def get_domain(self) -> str:
         return self.domain
 
+    def set_session(self, session):
+        """替换会话（如离线回放时使用的替身会话）"""
+        self._session = session
+
+    def get_session(self) -> requests.AsyncSession:
+        """
+        获取长连接会话，首次调用时创建
+        同一镜像的页面与封面请求共用连接池（keep-alive，可用时走 HTTP/2），
+        max_connections 即该镜像域名的最大并发连接数
+        """
+        if self._session is None:
+            self._session = requests.AsyncSession(
+                max_clients=self.max_connections,
+                proxies=self.proxies,
+                headers=HEADERS,
+                timeout=self.timeout,
+                impersonate=IMPERSONATE,
+            )
+        return self._session
+
+    async def get_cookie_session(self) -> requests.AsyncSession:
+        """获取装入了持久化 Cookie 的会话，Cookie 需要刷新时先刷新"""
+        session = self.get_session()
+        await self.cookies.load(session)
+        if self.cookies.is_expired():
+            await self.refresh_cookies()
+        return session
+
+    async def refresh_cookies(self):
+        """清空 Cookie 后访问首页重新领取，并保存领到的 Cookie"""
+        await self._cookie_refresh.do("refresh", self._refresh_cookies)
+
+    async def _refresh_cookies(self):
+        session = self.get_session()
+        self.cookies.clear(session)
+        logger.info(f"刷新 {self.get_scraper_name()} 的 Cookie")
+        start = response = None
+        try:
+            async with self.request_slot("cookie") as start:
+                response = await session.get(f"https://{self.domain}/")
+            self.health.record(time.monotonic() - start, response.status_code)
+            metrics.inc("cookie_refreshes_total", scraper=self.get_scraper_name(),
+                        result="ok" if response.status_code < 400 else "blocked")
+        except Exception as e:
+            if response is None and start is not None:
+                self.health.record(time.monotonic() - start, None)
+            metrics.inc("cookie_refreshes_total", scraper=self.get_scraper_name(), result="error")
+            logger.error(f"刷新 Cookie 失败: {str(e)}")
+        # 无论领到的 Cookie 是否与原来相同、领取是否成功，都更新保存时间，避免每个请求都重复刷新
+        await self.cookies.save(session, force=True)
+
+    @asynccontextmanager
+    async def request_slot(self, stage: str):
+        """
+        占用该镜像域名的一个请求名额，排到后给出请求开始的时间
+        排队时间单独计入 queue_wait_seconds，不计入镜像延迟与 stage 阶段的耗时
+        """
+        queued = time.monotonic()
+        async with self.scheduler.slot():
+            start = time.monotonic()
+            metrics.observe("queue_wait_seconds", start - queued, scraper=self.get_scraper_name())
+            with metrics.span(stage, scraper=self.get_scraper_name()):
+                yield start
+
+    async def close(self):
+        """关闭长连接会话"""
+        if self._session is not None:
+            session, self._session = self._session, None
+            await session.close()
+
     def get_scraper_name(self) -> str:
         """获取刮削器名称，子类必须实现"""
         raise NotImplementedError
@@ -39,21 +139,58 @@ class ScraperBase:
         """解析 HTML 获取元数据，子类必须实现"""
         raise NotImplementedError
 
-    async def fetch_html(self, url: str) -> Optional[str]:
-        """获取 HTML 页面"""
+    async def get_listing(self, page: int, prefix: Optional[str] = None) -> Optional[List[str]]:
+        """
+        获取列表页上的番号，prefix 为空时为最新发行，子类可选实现
+        页码超出范围时返回空列表，请求失败或不支持时返回 None
+        """
+        return None
+
+    async def fetch_html(self, url: str, avid: Optional[str] = None) -> Optional[str]:
+        """
+        获取 HTML 页面，页面不存在时抛出 NotFoundError，其他失败返回 None
+        传入 avid 时视为详情页，经过页面缓存：TTL 内直接使用缓存，过期后带条件请求头重新验证
+        """
+        cached = None
+        if avid is not None and self.page_cache is not None:
+            if (cached := await self.page_cache.get(url)) is not None and self.page_cache.is_fresh(cached):
+                metrics.inc("page_cache_total", result="hit")
+                return cached.text
         logger.info(f"Scraper fetch url: {url}")
+        start = response = None
         try:
-            async with requests.AsyncSession() as session:
-                response = await session.get(
-                    url,
-                    proxies=self.proxies,
-                    headers=HEADERS,
-                    timeout=self.timeout,
-                    impersonate=IMPERSONATE,
-                )
-                response.raise_for_status()
-                return response.text
+            session = await self.get_cookie_session()
+            for attempt in range(2):
+                async with self.request_slot("fetch") as start:
+                    response = await session.get(
+                        url, headers=self.page_cache.conditional_headers(cached) if cached else None)
+                self.health.record(time.monotonic() - start, response.status_code)
+                if attempt or response.status_code not in CHALLENGE_STATUS:
+                    break
+                logger.info(f"请求被拦截（HTTP {response.status_code}），刷新 Cookie 后重试: {url}")
+                response = None
+                await self.refresh_cookies()
+            # 保存镜像新下发的 Cookie
+            await self.cookies.save(session)
+            if response.status_code == 304 and cached is not None:
+                metrics.inc("page_cache_total", result="revalidated")
+                await self.page_cache.touch(url)
+                return cached.text
+            if response.status_code == 404:
+                raise NotFoundError(url)
+            response.raise_for_status()
+            if avid is not None and self.page_cache is not None:
+                metrics.inc("page_cache_total", result="miss")
+                await self.page_cache.put(url, avid, self.get_scraper_name(), response.text,
+                                          response.headers.get("ETag"), response.headers.get("Last-Modified"))
+            return response.text
+        except NotFoundError:
+            logger.info(f"页面不存在: {url}")
+            raise
         except Exception as e:
+            if response is None and start is not None:
+                # 连接失败或超时
+                self.health.record(time.monotonic() - start, None)
             logger.error(f"Scraper 请求失败: {str(e)}")
             return None
 
@@ -64,19 +201,25 @@ class ScraperBase:
         """
         avid = avid.upper()
         if html := await self.get_html(avid):
-            if metadata := self.parse_html(avid, html):
+            with metrics.span("parse", scraper=self.get_scraper_name()):
+                metadata = self.parse_html(avid, html)
+            if metadata:
                 logger.info(f"成功从 {self.get_scraper_name()} 获取 {avid} 的元数据")
                 return AVInfo.generate_from_scrapper(metadata)
         return None
 
-    async def download_image(self, image_url: str, save_path: Path) -> bool:
+    async def download_image(self, image_url: str, save_path: Path) -> Optional[str]:
         """
         下载图片并保存到指定路径
+        响应体分块写入同目录的临时文件（写文件在线程中进行），边下载边计算 SHA-256，
+        校验格式与完整性后原子地重命名为 save_path；超过 max_image_size 的图片会被放弃
 
         :param image_url: 图片 URL（可以是相对路径或绝对路径）
         :param save_path: 保存路径
-        :return: 成功返回 True，失败返回 False
+        :return: 成功返回图片的 SHA-256 摘要，失败返回 None
         """
+        temp_path = save_path.with_name(f".{save_path.name}.{uuid.uuid4().hex}.part")
+        start = response = None
         try:
             # 处理相对路径 URL
             if image_url.startswith('/'):
@@ -94,24 +237,49 @@ class ScraperBase:
             image_headers['Referer'] = f"https://{self.domain}/"
             image_headers['Accept'] = 'image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8'
 
-            # 下载图片
-            async with requests.AsyncSession() as session:
-                response = await session.get(
-                    full_url,
-                    proxies=self.proxies,
-                    headers=image_headers,
-                    timeout=self.timeout,
-                    impersonate=IMPERSONATE,
-                )
+            # 流式下载图片到临时文件
+            digest = hashlib.sha256()
+            size = 0
+            head = tail = b''
+            session = await self.get_cookie_session()
+            async with self.request_slot("download") as start, \
+                    session.stream("GET", full_url, headers=image_headers) as response:
+                self.health.record(time.monotonic() - start, response.status_code)
                 response.raise_for_status()
+                if int(response.headers.get('content-length') or 0) > self.max_image_size:
+                    raise ValueError(f"图片过大: {response.headers.get('content-length')} 字节")
+                f = await asyncio.to_thread(open, temp_path, 'wb')
+                try:
+                    async for chunk in response.aiter_content():
+                        if len(head) < 16:
+                            head = (head + chunk)[:16]
+                            if len(head) >= 12 and sniff_image_format(head) is None:
+                                raise ValueError("响应内容不是图片")
+                        size += len(chunk)
+                        if size > self.max_image_size:
+                            raise ValueError(f"图片超过 {self.max_image_size} 字节")
+                        digest.update(chunk)
+                        tail = (tail + chunk)[-32:]
+                        await asyncio.to_thread(f.write, chunk)
+                finally:
+                    await asyncio.to_thread(f.close)
+
+            if (image_format := sniff_image_format(head)) is None:
+                raise ValueError("响应内容不是图片")
+            if not is_complete(image_format, head, tail, size):
+                raise ValueError("图片不完整")
 
-                # 保存图片
-                with open(save_path, 'wb') as f:
-                    f.write(response.content)
+            # 原子替换
+            await asyncio.to_thread(os.replace, temp_path, save_path)
 
-                logger.info(f"图片已保存: {save_path} ({len(response.content)} 字节)")
-                return True
+            logger.info(f"图片已保存: {save_path} ({size} 字节)")
+            return digest.hexdigest()
 
         except Exception as e:
+            if response is None and start is not None:
+                # 连接失败或超时
+                self.health.record(time.monotonic() - start, None)
             logger.error(f"下载图片失败: {str(e)}")
-            return False
+            return None
+        finally:
+            temp_path.unlink(missing_ok=True)
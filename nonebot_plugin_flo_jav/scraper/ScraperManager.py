@@ -1,22 +1,40 @@
 """
 Scraper 管理器 - 管理所有刮削器的注册和调用
 """
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Optional, Dict, List, Tuple
 
 from nonebot.log import logger
 
-from .ScraperBase import ScraperBase
+from .ScraperBase import ScraperBase, NotFoundError
+from .MirrorHealth import MirrorHealth
+from .SessionCookies import SessionCookies
 from .Javbus import Javbus, Busdmm, Dmmsee
+from ..cache import MetadataCache, PageCache, CoverStore
 from ..model import AVInfo
+from ..model.AVInfo import TIME_FORMAT
 from ..repository.AVInfoRepo import avinfo_repo
+from ..repository.AVIndexRepo import avindex_repo
+from ..repository.WriteBehindBuffer import WriteBehindBuffer
+from ..repository.PageCacheRepo import page_cache_repo
+from ..repository.CoverRepo import cover_repo
+from ..utils import SingleFlight, TokenBucketScheduler, metrics
+from ..utils import background_priority
 
 from ..config import jav_config, data_dir
+from ..constants import POSSIBLE_PREFIX
 
 
 class ScraperManager:
     """刮削器管理器"""
 
+    # 随机生成编号时，允许超出前缀已知最大编号的范围
+    RANGE_MARGIN = 50
+
     # 刮削器类映射
     SCRAPER_CLASSES = {
         'javbus': Javbus,
@@ -26,31 +44,360 @@ class ScraperManager:
 
     def __init__(self,
                  proxy: Optional[str] = None,
-                 image_path: Optional[Path] = None):
+                 image_path: Optional[Path] = None,
+                 timeout: int = 15,
+                 hedge_delay: float = 1.5,
+                 race_timeout: float = 30,
+                 max_connections: int = 10,
+                 cache: Optional[MetadataCache] = None,
+                 batch_concurrency: int = 4,
+                 max_image_size: int = 10 * 1024 * 1024,
+                 health_window: int = 20,
+                 breaker_threshold: int = 3,
+                 breaker_cooldown: float = 300,
+                 rate_limit: float = 0,
+                 rate_burst: int = 1,
+                 max_in_flight: int = 0,
+                 refresh_age: float = 0,
+                 refresh_window: int = 0,
+                 refresh_interval: float = 10,
+                 write_delay: float = 0.05,
+                 write_batch: int = 100,
+                 page_cache: Optional[PageCache] = None,
+                 cover_max_size: int = 0,
+                 cookie_max_age: float = 0):
         self.proxy: Optional[str] = proxy
         self.image_path: Optional[Path] = image_path
+        self.covers = CoverStore(image_path, cover_repo, cover_max_size)
+        self.hedge_delay: float = hedge_delay
+        self.race_timeout: float = race_timeout
+        self.batch_concurrency: int = batch_concurrency
+        # 过期后台刷新：刮削超过 refresh_age 秒即过期；发行 refresh_window 天后刮削的数据视为稳定不再刷新；
+        # 两次刷新至少间隔 refresh_interval 秒
+        self.refresh_age: float = refresh_age
+        self.refresh_window: int = refresh_window
+        self.refresh_interval: float = refresh_interval
+        self._last_refresh_at: float = 0
+        self._refreshing: set[str] = set()
         self.avinfo_repo = avinfo_repo
+        self.avindex_repo = avindex_repo
+        # 元数据写入先进写缓冲，合并提交
+        self.writer = WriteBehindBuffer(avinfo_repo, write_delay, write_batch)
+        # 最近一次用户查询的时间，后台任务据此判断是否空闲
+        self.last_request_at: float = 0
+        self.cache: MetadataCache = cache if cache is not None else MetadataCache()
+        # 详情页磁盘缓存，各刮削器共用，可用于离线重新解析
+        self.page_cache: Optional[PageCache] = page_cache
+        # 同一 AVID 的并发查询与封面下载各自只执行一次
+        self._lookups = SingleFlight()
+        self._downloads = SingleFlight()
+        # 后台封面下载任务，保留引用以免被回收
+        self._background: set[asyncio.Task] = set()
         self.scrapers: Dict[str, ScraperBase] = {}
         for name, scraper in self.SCRAPER_CLASSES.items():
-            scraper = scraper(proxy)
+            scraper = scraper(proxy, timeout, max_connections, max_image_size)
+            scraper.health = MirrorHealth(health_window, breaker_threshold, breaker_cooldown)
+            scraper.scheduler = TokenBucketScheduler(rate_limit, rate_burst, max_in_flight)
+            scraper.page_cache = page_cache
+            scraper.cookies = SessionCookies(scraper.get_scraper_name(), cookie_max_age)
             self.scrapers[scraper.get_scraper_name()] = scraper
             logger.info(f"注册刮削器: {scraper.get_scraper_name()}, 域名: {scraper.get_domain()}")
+        self._register_metrics()
+
+    def _register_metrics(self):
+        """注册采集时读取的状态量"""
+        def per_scraper(value):
+            return lambda: {(("scraper", name),): value(scraper) for name, scraper in self.scrapers.items()}
+
+        metrics.gauge("queue_depth", "排队等待发出的请求数", per_scraper(lambda s: s.scheduler.queue_depth))
+        metrics.gauge("in_flight", "正在进行的请求数", per_scraper(lambda s: s.scheduler.in_flight))
+        metrics.gauge("mirror_latency_seconds", "镜像最近请求的平均延迟", per_scraper(lambda s: s.health.get_latency()))
+        metrics.gauge("mirror_success_rate", "镜像最近请求的成功率", per_scraper(lambda s: s.health.get_success_rate()))
+        metrics.gauge("mirror_open", "镜像是否处于熔断中", per_scraper(lambda s: int(s.health.is_open())))
+        metrics.gauge("cookie_age_seconds", "镜像 Cookie 距上次更新的秒数", lambda: {
+            (("scraper", name),): age for name, scraper in self.scrapers.items()
+            if (age := scraper.cookies.get_age()) is not None
+        })
+        metrics.gauge("cache_entries", "内存元数据缓存条目数", lambda: {(): self.cache.stats()["size"]})
+        metrics.gauge("cache_hit_rate", "内存元数据缓存命中率", lambda: {(): self.cache.stats()["hit_rate"]})
+        metrics.gauge("cover_store_bytes", "封面库占用（不含缩略图）", lambda: {(): self.covers.repo.total_size})
+        if self.page_cache is not None:
+            metrics.gauge("page_cache_bytes", "详情页磁盘缓存占用（压缩后）", lambda: {(): self.page_cache.repo.total_size})
+
+    async def close(self):
+        """写入缓冲中的元数据与封面访问时间，并关闭所有刮削器的长连接会话"""
+        await self.writer.close()
+        await self.covers.flush()
+        for scraper in self.scrapers.values():
+            await scraper.close()
 
     def get_scrapers(self) -> List[Tuple[str, ScraperBase]]:
-        """获取所有已注册的刮削器列表"""
-        return [(name, scraper) for name, scraper in self.scrapers.items()]
+        """
+        获取可用的刮削器列表，按最近成功率加权的延迟从优到劣排序
+        熔断中的镜像会被跳过；全部熔断时仍返回所有镜像，避免查询直接失败
+        """
+        ranked = sorted(self.scrapers.items(), key=lambda item: item[1].health.get_score())
+        return [(name, scraper) for name, scraper in ranked if not scraper.health.is_open()] or ranked
+
+    def get_health(self) -> Dict[str, dict]:
+        """各镜像的健康状态"""
+        return {name: scraper.health.snapshot() for name, scraper in self.scrapers.items()}
+
+    def get_cookie_ages(self) -> Dict[str, Optional[float]]:
+        """各镜像 Cookie 距上次更新的秒数，没有 Cookie 时为 None"""
+        return {name: scraper.cookies.get_age() for name, scraper in self.scrapers.items()}
 
-    async def scrape_from_any(self, avid: str) -> Optional[AVInfo]:
+    def get_queue_depth(self) -> Dict[str, int]:
+        """各镜像域名正在排队的请求数"""
+        return {name: scraper.scheduler.queue_depth for name, scraper in self.scrapers.items()}
+
+    async def scrape_from_any(self, avid: str, wait_cover: bool = True) -> Optional[AVInfo]:
         """
-        遍历所有刮削器获取元数据
-        返回第一个成功获取的元数据
+        并发（按对冲延迟错峰）向所有刮削器请求元数据
+        返回第一个成功获取的元数据，其余请求会被取消
+        同一 AVID 的并发查询共享同一次刮削与封面下载
+
+        :param wait_cover: 为 False 时拿到元数据立即返回，封面在后台下载，可通过 get_cover 等待
         """
         avid = avid.upper()
-        if metadata := await self._load_cache(avid):
-            return metadata
-        for name, scraper in self.get_scrapers():
-            metadata = await self._scrape(avid, scraper)
-            return metadata
+        self.last_request_at = time.monotonic()
+        with metrics.span("cache"):
+            entry = self.cache.get(avid)
+        if entry:
+            if entry.is_missing():
+                metrics.inc("lookups_total", source="negative_cache")
+                logger.info(f"{avid} 已确认不存在（负缓存命中）")
+                return None
+            metrics.inc("lookups_total", source="cache")
+            metadata = self._revalidate(entry.info)
+        else:
+            metadata = await self._lookups.do(avid, lambda: self._lookup(avid))
+        if metadata is not None and wait_cover:
+            await self.get_cover(metadata)
+        return metadata
+
+    async def get_cover(self, metadata: AVInfo) -> Optional[Path]:
+        """
+        获取本地封面路径，封面缺失或损坏时重新下载（同一 AVID 同时只有一个下载）
+        下载失败返回 None
+        """
+        avid = metadata.get_avid()
+        if (entry := self.cache.peek(avid)) is not None and entry.cover_path is not None \
+                and entry.cover_path.exists():
+            # 封面可能已被封面库淘汰，因此仍要确认文件存在
+            self.covers.touch(avid)
+            return entry.cover_path
+        return await self._downloads.do(avid, lambda: self._ensure_cover(avid, metadata))
+
+    async def scrape_many(self, avids: List[str]) -> Dict[str, Optional[AVInfo]]:
+        """
+        批量获取元数据
+        内存缓存之外的 AVID 先用一条 SQL 从数据库取出，剩余的以 batch_concurrency 为并发上限刮削
+        返回按输入顺序（去重后）排列的 avid -> AVInfo，获取失败的为 None
+        """
+        avids = list(dict.fromkeys(avid.upper() for avid in avids))
+        results: Dict[str, Optional[AVInfo]] = {}
+        pending: List[str] = []
+        with metrics.span("cache"):
+            for avid in avids:
+                if not (entry := self.cache.get(avid)):
+                    pending.append(avid)
+                elif entry.is_missing():
+                    metrics.inc("lookups_total", source="negative_cache")
+                    results[avid] = None
+                else:
+                    metrics.inc("lookups_total", source="cache")
+                    results[avid] = self._revalidate(entry.info)
+
+        stored = {}
+        if pending:
+            with metrics.span("sqlite_read"):
+                stored = await self.avinfo_repo.get_many_async(pending)
+        semaphore = asyncio.Semaphore(self.batch_concurrency)
+
+        async def resolve(avid: str) -> Optional[AVInfo]:
+            async with semaphore:
+                if (metadata := stored.get(avid) or self.writer.get(avid)) is not None:
+                    await self.get_cover(self._revalidate(self._remember(avid, metadata)))
+                    return metadata
+                return await self.scrape_from_any(avid)
+
+        found = await asyncio.gather(*(resolve(avid) for avid in pending))
+        results.update(zip(pending, found))
+        return {avid: results[avid] for avid in avids}
+
+    async def scrape_random(self, attempts: int = 7, fanout: int = 3,
+                            known_ratio: float = 0.5) -> Optional[AVInfo]:
+        """
+        随机获取一部作品的元数据
+        候选番号中约 known_ratio 的比例取自番号索引中已确认存在的番号（通常命中缓存，无需联网），
+        其余按索引学到的各前缀编号范围生成，并跳过已确认不存在的编号；
+        最多 fanout 个候选同时探测，任一命中后取消其余探测；命中作品的封面在后台下载
+        """
+        candidates = await self._random_candidates(attempts, known_ratio)
+        semaphore = asyncio.Semaphore(fanout)
+
+        async def probe(avid: str) -> Optional[AVInfo]:
+            async with semaphore:
+                return await self.scrape_from_any(avid, wait_cover=False)
+
+        tasks = [asyncio.create_task(probe(avid)) for avid in candidates]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    if metadata := await next_done:
+                        return metadata
+                except Exception as e:
+                    logger.error(f"随机探测出错: {e}")
+        finally:
+            for task in tasks:
+                task.cancel()
+        return None
+
+    async def _random_candidates(self, attempts: int, known_ratio: float) -> List[str]:
+        known = await self.avindex_repo.sample_found_async(round(attempts * known_ratio))
+        candidates = list(dict.fromkeys(known + await self._guess_avids(attempts - len(known))))
+        random.shuffle(candidates)
+        return candidates
+
+    async def _guess_avids(self, count: int, frontier: bool = False) -> List[str]:
+        """
+        按番号索引生成 count 个未探测过的候选番号
+        编号范围取 1 ~ 该前缀已知最大编号 + RANGE_MARGIN；frontier 为 True 时只在已知最大编号之后探测，用于扩展索引
+        """
+        prefixes = random.choices(POSSIBLE_PREFIX, k=count)
+        numbers = {prefix: await self.avindex_repo.get_prefix_numbers_async(prefix) for prefix in set(prefixes)}
+        candidates: List[str] = []
+        for prefix in prefixes:
+            found, missing = numbers[prefix]
+            top = max(found, default=0)
+            low = top + 1 if frontier and top else 1
+            high = min(999, top + self.RANGE_MARGIN) if top else 999
+            if low > high:
+                continue
+            for _ in range(10):
+                number = random.randint(low, high)
+                avid = f"{prefix}-{number:03d}"
+                if number in missing or (frontier and number in found) or avid in candidates:
+                    continue
+                candidates.append(avid)
+                break
+        return candidates
+
+    async def grow_index(self, count: int) -> int:
+        """
+        后台扩展番号索引：在各前缀已知范围的边界附近探测 count 个新番号，只写入元数据不下载封面
+        :return: 新发现的存在番号数
+        """
+        discovered = 0
+        for avid in await self._guess_avids(count, frontier=True):
+            try:
+                if winner := await self._race(avid):
+                    self.writer.submit(winner[1])
+                    with metrics.span("sqlite_write"):
+                        await self.avindex_repo.record_async(avid, True)
+                    discovered += 1
+            except NotFoundError:
+                with metrics.span("sqlite_write"):
+                    await self.avindex_repo.record_async(avid, False)
+        logger.info(f"番号索引扩展完成，探测 {count} 个，新发现 {discovered} 个")
+        return discovered
+
+    async def prefetch(self, avid: str, scraper: ScraperBase) -> bool:
+        """
+        后台预取：从指定刮削器刮削元数据入库并下载封面，不写入内存缓存
+        :return: 是否成功入库
+        """
+        try:
+            metadata = await scraper.scrape(avid)
+        except NotFoundError:
+            with metrics.span("sqlite_write"):
+                await self.avindex_repo.record_async(avid, False)
+            return False
+        if metadata is None:
+            return False
+        self.writer.submit(metadata)
+        with metrics.span("sqlite_write"):
+            await self.avindex_repo.record_async(avid, True)
+        await self._downloads.do(avid, lambda: self._ensure_cover(avid, metadata))
+        return True
+
+    async def find_by_tag(self, kind: str, name: str, page: int, page_size: int) -> Tuple[int, List[AVInfo]]:
+        """
+        按演员、系列等标签在本地数据库中查找，不联网
+        :return: (总数, 第 page 页的结果)
+        """
+        with metrics.span("sqlite_read"):
+            return await self.avinfo_repo.get_by_tag_async(kind, name, page_size, (page - 1) * page_size)
+
+    async def search(self, keywords: List[str], page: int, page_size: int) -> Tuple[int, List[AVInfo]]:
+        """
+        在本地数据库中全文检索，不联网
+        :return: (总数, 第 page 页的结果)
+        """
+        with metrics.span("search"):
+            return await self.avinfo_repo.search_async(keywords, page_size, (page - 1) * page_size)
+
+    async def reparse(self, batch_size: int = 200) -> Tuple[int, int]:
+        """
+        用页面缓存中的详情页重新解析并覆盖数据库中的元数据，不联网
+        解析规则修正后无需重新抓取即可修复已入库的数据，刮削时间沿用页面的抓取时间
+        :return: (页面数, 成功解析数)
+        """
+        if self.page_cache is None:
+            return 0, 0
+        await self.writer.flush()
+        after = pages = parsed = 0
+        while rows := await self.page_cache.repo.get_pages_async(after, batch_size):
+            after = rows[-1][0]
+            pages += len(rows)
+            with metrics.span("parse", scraper="reparse"):
+                avinfos = await asyncio.to_thread(self._parse_pages, rows)
+            if not avinfos:
+                continue
+            with metrics.span("sqlite_write"):
+                await self.avinfo_repo.bulk_upsert_async(avinfos)
+            for avinfo in avinfos:
+                self.cache.invalidate(avinfo.get_avid())
+            parsed += len(avinfos)
+        logger.info(f"重新解析完成，共 {pages} 个缓存页面，成功 {parsed} 个")
+        return pages, parsed
+
+    def _parse_pages(self, rows: List[tuple]) -> List[AVInfo]:
+        """在线程中解压并解析一批缓存页面"""
+        avinfos = []
+        for _, avid, source, fetched_at, body in rows:
+            if (scraper := self.scrapers.get(source)) is None:
+                continue
+            try:
+                if data := scraper.parse_html(avid, PageCache.decompress(body)):
+                    avinfos.append(AVInfo.generate_from_scrapper(data, datetime.fromtimestamp(fetched_at)))
+            except Exception as e:
+                logger.warning(f"重新解析 {avid} 失败: {str(e)}")
+        return avinfos
+
+    def is_idle(self, idle_seconds: float) -> bool:
+        """没有进行中的查询且距上次用户查询已超过 idle_seconds"""
+        return len(self._lookups) == 0 and time.monotonic() - self.last_request_at >= idle_seconds
+
+    async def _lookup(self, avid: str) -> Optional[AVInfo]:
+        """查数据库，未命中时刮削；拿到元数据后封面在后台开始下载"""
+        if metadata := await self._load(avid):
+            metrics.inc("lookups_total", source="database")
+            return self._revalidate(self._remember(avid, metadata))
+        try:
+            if winner := await self._race(avid):
+                metrics.inc("lookups_total", source="scraper")
+                scraper, metadata = winner
+                return await self._save(avid, scraper, metadata)
+        except NotFoundError:
+            metrics.inc("lookups_total", source="not_found")
+            self.cache.put_missing(avid)
+            with metrics.span("sqlite_write"):
+                await self.avindex_repo.record_async(avid, False)
+            logger.info(f"所有刮削源都确认 {avid} 不存在")
+            return None
+        metrics.inc("lookups_total", source="failed")
         logger.warning(f"无法从任何刮削源获取 {avid} 的元数据")
         return None
 
@@ -59,37 +406,172 @@ class ScraperManager:
         从指定的刮削器获取元数据
         """
         avid = avid.upper()
-        if metadata := await self._load_cache(avid):
-            return metadata
-        scraper = self.scrapers.get(scraper_name)
-        if scraper:
-            metadata = await self._scrape(avid, scraper)
+        if metadata := await self._load(avid):
+            metadata = self._revalidate(self._remember(avid, metadata))
+        elif scraper := self.scrapers.get(scraper_name):
+            try:
+                if metadata := await scraper.scrape(avid):
+                    metadata = await self._save(avid, scraper, metadata)
+            except NotFoundError:
+                return None
+        if metadata is not None:
+            await self.get_cover(metadata)
+        return metadata
+
+    async def _load(self, avid: str) -> Optional[AVInfo]:
+        """从数据库读取元数据，写缓冲中尚未落盘的数据优先"""
+        if metadata := self.writer.get(avid):
             return metadata
-        return None
+        with metrics.span("sqlite_read"):
+            return await self.avinfo_repo.get_from_source_async(avid, None)
+
+    async def _save(self, avid: str, scraper: ScraperBase, metadata: AVInfo) -> AVInfo:
+        self.writer.submit(metadata)
+        with metrics.span("sqlite_write"):
+            await self.avindex_repo.record_async(avid, True)
+        logger.info(f"成功从{scraper.get_scraper_name()}刮削数据！准备下载封面图......")
+        return self._remember(avid, metadata)
 
-    def get_image_path(self, avid: str) -> Optional[Path]:
-        return self.image_path / avid.upper()
+    def _remember(self, avid: str, metadata: AVInfo) -> AVInfo:
+        """写入内存缓存，并在后台开始准备封面"""
+        self.cache.put(avid, metadata)
+        task = asyncio.create_task(self.get_cover(metadata))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return metadata
 
-    async def _load_cache(self, avid: str) -> Optional[AVInfo]:
-        if metadata := self.avinfo_repo.get_from_source(avid, None):
-            if not self.get_image_path(avid).exists():
-                scraper = self.scrapers[metadata.get_source()]
-                if not await scraper.download_image(metadata.get_image_url(), self.get_image_path(avid)):
-                    logger.warning(f"下载封面失败：{metadata.get_image_url()}")
-                    return None
+    def _is_stale(self, metadata: AVInfo) -> bool:
+        """刮削时间超过 refresh_age 且刮削时作品发行未满 refresh_window 天（元数据可能还在补全）"""
+        if not (scraped_at := metadata.get_scraped_at()):
+            return True
+        if scraped_at > (datetime.now() - timedelta(seconds=self.refresh_age)).strftime(TIME_FORMAT):
+            return False
+        if self.refresh_window <= 0 or not (release_date := metadata.get_release_date()):
+            return True
+        settled = datetime.strptime(scraped_at, TIME_FORMAT) - timedelta(days=self.refresh_window)
+        return settled.strftime("%Y-%m-%d") < release_date
+
+    def _revalidate(self, metadata: AVInfo) -> AVInfo:
+        """
+        过期的元数据照常返回，同时在后台重新刮削（同一 AVID 同时只刷新一次，两次刷新至少间隔 refresh_interval 秒）
+        """
+        if self.refresh_age <= 0 or not self._is_stale(metadata):
             return metadata
-        return None
+        avid = metadata.get_avid()
+        now = time.monotonic()
+        if avid in self._refreshing or now - self._last_refresh_at < self.refresh_interval:
+            return metadata
+        self._last_refresh_at = now
+        self._refreshing.add(avid)
+        task = asyncio.create_task(self._refresh(avid, metadata))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return metadata
+
+    async def _refresh(self, avid: str, metadata: AVInfo):
+        """从原来源重新刮削并覆盖旧数据，失败时保留旧数据；请求与随后的封面下载都按后台优先级排队"""
+        try:
+            with background_priority():
+                if (scraper := self.scrapers.get(metadata.get_source())) is None:
+                    return
+                try:
+                    fresh = await scraper.scrape(avid)
+                except NotFoundError:
+                    fresh = None
+                if fresh is None:
+                    metrics.inc("refreshes_total", result="failed")
+                    return
+                self.writer.submit(fresh)
+                self._remember(avid, fresh)
+                metrics.inc("refreshes_total", result="updated")
+                logger.info(f"已从 {scraper.get_scraper_name()} 刷新 {avid} 的元数据")
+        except Exception as e:
+            logger.error(f"刷新 {avid} 出错: {e}")
+        finally:
+            self._refreshing.discard(avid)
 
-    async def _scrape(self, avid: str, scraper: ScraperBase) -> Optional[AVInfo]:
-        if metadata := await scraper.scrape(avid):
-            self.avinfo_repo.create_or_update_avinfo(metadata)
-            logger.info(f"成功从{scraper.get_scraper_name()}刮削数据！准备下载封面图......")
-            if await scraper.download_image(metadata.get_image_url(), self.get_image_path(avid)):
-                return metadata
+    async def _ensure_cover(self, avid: str, metadata: AVInfo) -> Optional[Path]:
+        if (path := await self.covers.get(avid)) is None:
+            scraper = self.scrapers.get(metadata.get_source())
+            staged = self.covers.get_staging_path(avid)
+            if scraper is None or not (digest := await scraper.download_image(metadata.get_image_url(), staged)):
+                logger.warning(f"下载封面失败：{metadata.get_image_url()}")
+                return None
+            path = await self.covers.add(avid, staged, digest)
+        self.cache.set_cover(avid, path)
+        return path
+
+    async def _race(self, avid: str) -> Optional[Tuple[ScraperBase, AVInfo]]:
+        """
+        对冲请求：依次启动各刮削器，前一个在 hedge_delay 内没有结果（或已失败）时启动下一个，
+        第一个成功解析的结果胜出，其余未完成的请求全部取消；
+        所有刮削器都返回页面不存在时抛出 NotFoundError
+        """
+        waiting = [scraper for _, scraper in self.get_scrapers()]
+        attempts = len(waiting)
+        not_found = 0
+        running: Dict[asyncio.Task, ScraperBase] = {}
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.race_timeout
+        try:
+            while waiting or running:
+                if waiting:
+                    scraper = waiting.pop(0)
+                    task = asyncio.create_task(scraper.scrape(avid), name=scraper.get_scraper_name())
+                    running[task] = scraper
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    logger.warning(f"刮削 {avid} 超时（{self.race_timeout}s）")
+                    break
+                timeout = min(self.hedge_delay, remaining) if waiting else remaining
+                done, _ = await asyncio.wait(running, timeout=timeout,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    scraper = running.pop(task)
+                    if isinstance(task.exception(), NotFoundError):
+                        not_found += 1
+                    elif task.exception() is not None:
+                        logger.error(f"{scraper.get_scraper_name()} 刮削 {avid} 出错: {task.exception()}")
+                    elif metadata := task.result():
+                        return scraper, metadata
+        finally:
+            for task in running:
+                task.cancel()
+        if attempts and not_found == attempts:
+            raise NotFoundError(avid)
         return None
 
 
 scraper_manager = ScraperManager(
     jav_config.jav_proxy,
-    data_dir / "image"
+    data_dir / "image",
+    jav_config.jav_timeout,
+    jav_config.jav_hedge_delay,
+    jav_config.jav_race_timeout,
+    jav_config.jav_max_connections,
+    MetadataCache(
+        jav_config.jav_cache_size,
+        jav_config.jav_cache_ttl,
+        jav_config.jav_negative_cache_ttl,
+    ),
+    jav_config.jav_batch_concurrency,
+    jav_config.jav_image_max_size,
+    jav_config.jav_health_window,
+    jav_config.jav_breaker_threshold,
+    jav_config.jav_breaker_cooldown,
+    jav_config.jav_rate_limit,
+    jav_config.jav_rate_burst,
+    jav_config.jav_max_in_flight,
+    jav_config.jav_refresh_age,
+    jav_config.jav_refresh_window,
+    jav_config.jav_refresh_interval,
+    jav_config.jav_write_delay,
+    jav_config.jav_write_batch,
+    PageCache(
+        page_cache_repo,
+        jav_config.jav_page_cache_size,
+        jav_config.jav_page_cache_ttl,
+    ),
+    jav_config.jav_cover_store_size,
+    jav_config.jav_cookie_max_age,
 )
@@ -0,0 +1,97 @@
+"""
+会话 Cookie - 把镜像下发的 Cookie（年龄确认、Cloudflare 放行等）持久化到数据库，重启后装回长连接会话，
+避免每次都重新走质询
+"""
+import json
+import time
+from http.cookiejar import CookieJar
+from typing import Optional
+
+from nonebot.log import logger
+
+from ..model import SourceCookie
+from ..repository.CookieRepo import cookie_repo
+
+
+class SessionCookies:
+    """
+    单个镜像的 Cookie 状态
+    数据库中以 JSON 保存 [[name, value, domain, path, expires], ...]，
+    保存时间超过 max_age 秒或其中有 Cookie 过期时视为需要刷新
+    """
+
+    def __init__(self, source: str, max_age: float = 0):
+        """
+        :param max_age: Cookie 保存多久（秒）后主动刷新，0 表示只在过期或被拦截时刷新
+        """
+        self.source = source
+        self.max_age = max_age
+        self.loaded = False
+        self._current: Optional[SourceCookie] = None
+        self._expires: list[float] = []
+
+    @staticmethod
+    def _get_jar(session) -> Optional[CookieJar]:
+        """会话的 Cookie 容器，替身会话没有时返回 None"""
+        return getattr(getattr(session, "cookies", None), "jar", None)
+
+    @staticmethod
+    def _dump(jar: CookieJar) -> str:
+        return json.dumps([[cookie.name, cookie.value, cookie.domain, cookie.path, cookie.expires]
+                           for cookie in jar], ensure_ascii=False)
+
+    def get_age(self) -> Optional[float]:
+        """距上次保存的秒数，没有保存过时返回 None"""
+        return self._current.get_age() if self._current is not None else None
+
+    def is_expired(self) -> bool:
+        if (age := self.get_age()) is None:
+            return False
+        if self.max_age and age > self.max_age:
+            return True
+        now = time.time()
+        return any(expires < now for expires in self._expires)
+
+    async def load(self, session):
+        """从数据库装入 Cookie，只在第一次调用时执行"""
+        if self.loaded:
+            return
+        self.loaded = True
+        if (jar := self._get_jar(session)) is None:
+            return
+        if (stored := await cookie_repo.get_source_cookie_async(self.source)) is None:
+            return
+        try:
+            cookies = json.loads(stored.get_cookie())
+        except ValueError:
+            logger.warning(f"{self.source} 保存的 Cookie 无法解析，已忽略")
+            return
+        for name, value, domain, path, expires in cookies:
+            session.cookies.set(name, value, domain=domain, path=path)
+        self._current = stored
+        self._expires = [expires for *_, expires in cookies if expires]
+        logger.info(f"已装入 {self.source} 的 {len(cookies)} 个 Cookie，保存于 {stored.get_updated_at()}")
+
+    async def save(self, session, force: bool = False):
+        """
+        会话中的 Cookie 与上次保存的不同时写入数据库
+        :param force: 即使没有变化也写入并更新保存时间（刷新后镜像下发的 Cookie 可能与原来相同）
+        """
+        if (jar := self._get_jar(session)) is None:
+            return
+        cookie = self._dump(jar)
+        if not force:
+            if self._current is not None and self._current.get_cookie() == cookie:
+                return
+            if self._current is None and not len(jar):
+                return
+        source_cookie = SourceCookie.generate_from_source({"source": self.source, "cookie": cookie})
+        if await cookie_repo.create_or_update_source_cookie_async(source_cookie):
+            self._current = source_cookie
+            self._expires = [cookie.expires for cookie in jar if cookie.expires]
+
+    def clear(self, session):
+        """清空会话中的 Cookie，准备重新领取"""
+        if (jar := self._get_jar(session)) is not None:
+            jar.clear()
+        self._expires = []
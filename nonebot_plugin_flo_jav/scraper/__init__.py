@@ -1,10 +1,13 @@
-from .ScraperBase import ScraperBase
+from .ScraperBase import ScraperBase, NotFoundError
 from .Javbus import Javbus, Busdmm, Dmmsee
 from .ScraperManager import ScraperManager
+from .Prefetcher import Prefetcher
 
 __all__ = [
     "ScraperBase",
+    "NotFoundError",
     "ScraperManager",
+    "Prefetcher",
     "Javbus",
     "Busdmm",
     "Dmmsee"
@@ -0,0 +1,56 @@
+"""
+后台任务 - 周期性执行的维护任务，随机器人启动和关闭
+"""
+import asyncio
+from typing import Awaitable, Callable, List, Optional
+
+from nonebot.log import logger
+
+from .RateLimiter import background_priority
+
+
+class BackgroundJobs:
+    """周期任务调度器"""
+
+    def __init__(self):
+        self._jobs: List[tuple[str, float, Callable[[], Awaitable], Optional[Callable[[], bool]]]] = []
+        self._tasks: List[asyncio.Task] = []
+
+    def every(self, name: str, interval: float, job: Callable[[], Awaitable],
+              condition: Optional[Callable[[], bool]] = None):
+        """
+        注册周期任务
+        :param name: 任务名，用于日志
+        :param interval: 执行间隔（秒），不大于 0 时不注册
+        :param job: 任务协程函数
+        :param condition: 每次执行前检查的条件（如机器人是否空闲），不满足时跳过本轮
+        """
+        if interval > 0:
+            self._jobs.append((name, interval, job, condition))
+
+    def start(self):
+        for name, interval, job, condition in self._jobs:
+            self._tasks.append(asyncio.create_task(self._loop(name, interval, job, condition), name=name))
+            logger.info(f"后台任务已启动: {name}（间隔 {interval}s）")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    @staticmethod
+    async def _loop(name: str, interval: float, job: Callable[[], Awaitable],
+                    condition: Optional[Callable[[], bool]]):
+        # 后台任务发出的请求排在用户查询之后（只影响本任务的上下文）
+        with background_priority():
+            while True:
+                await asyncio.sleep(interval)
+                if condition is not None and not condition():
+                    continue
+                try:
+                    await job()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"后台任务 {name} 出错: {e}")
@@ -0,0 +1,66 @@
+"""
+图片文件校验 - 识别格式、检查文件是否完整、比对校验和
+"""
+import hashlib
+from pathlib import Path
+from typing import Optional
+
+# 文件头 -> 格式
+SIGNATURES = (
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+)
+
+
+def sniff_image_format(head: bytes) -> Optional[str]:
+    """根据文件头判断图片格式，不是图片时返回 None"""
+    for signature, image_format in SIGNATURES:
+        if head.startswith(signature):
+            return image_format
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def is_complete(image_format: str, head: bytes, tail: bytes, size: int) -> bool:
+    """根据文件尾判断图片是否完整（没有被截断）"""
+    if image_format == "jpeg":
+        # 部分编码器会在 EOI 之后补几个字节
+        return b"\xff\xd9" in tail[-32:]
+    if image_format == "png":
+        return tail.endswith(b"IEND\xaeB`\x82")
+    if image_format == "gif":
+        return tail.endswith(b";")
+    if image_format == "webp":
+        return int.from_bytes(head[4:8], "little") + 8 == size
+    return False
+
+
+def file_checksum(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def verify_image(path: Path, digest: Optional[str] = None) -> bool:
+    """
+    检查本地图片是否可用：存在、格式可识别、没有被截断，且与给出的 SHA-256 摘要一致（如果给出）
+    给出摘要时会读取整个文件，应在事件循环之外调用
+    """
+    try:
+        size = path.stat().st_size
+        with open(path, "rb") as f:
+            head = f.read(16)
+            f.seek(max(0, size - 32))
+            tail = f.read()
+    except OSError:
+        return False
+    if (image_format := sniff_image_format(head)) is None or not is_complete(image_format, head, tail, size):
+        return False
+    if digest is not None:
+        return file_checksum(path) == digest
+    return True
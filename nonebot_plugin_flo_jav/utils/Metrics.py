@@ -0,0 +1,161 @@
+"""
+运行指标 - 热路径耗时分段、计数器与采集时读取的状态量，可导出为 Prometheus 文本格式
+"""
+import bisect
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+# 耗时直方图的桶上界（秒）
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _escape(value: str) -> str:
+    """转义标签值中的反斜杠、引号与换行"""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    """单个标签组合的耗时分布"""
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """按桶估算分位数（取所在桶的上界）"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class Metrics:
+    """指标注册表，只在事件循环线程中更新"""
+
+    def __init__(self, prefix: str = "jav"):
+        self.prefix = prefix
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._gauges: Dict[str, Tuple[str, Callable[[], Dict[Labels, float]]]] = {}
+
+    @staticmethod
+    def _labels(labels: dict) -> Labels:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """计数器加 value"""
+        key = (name, self._labels(labels))
+        self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """记录一次耗时（秒）"""
+        key = (name, self._labels(labels))
+        if (histogram := self._histograms.get(key)) is None:
+            histogram = self._histograms[key] = Histogram()
+        histogram.observe(value)
+
+    @contextmanager
+    def span(self, stage: str, **labels):
+        """
+        记录一段代码的耗时，写入 <prefix>_stage_seconds{stage=...}
+        可包住 await，协程内使用即可；出错时额外计入 <prefix>_stage_errors_total
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc("stage_errors_total", stage=stage, **labels)
+            raise
+        finally:
+            self.observe("stage_seconds", time.perf_counter() - start, stage=stage, **labels)
+
+    def gauge(self, name: str, description: str, collect: Callable[[], Dict[Labels, float]]):
+        """
+        注册采集时读取的状态量
+        :param collect: 返回 标签 -> 数值 的函数，标签为 (("key", "value"), ...) 元组，无标签时为 ()
+        """
+        self._gauges[name] = (description, collect)
+
+    def get_stages(self) -> List[dict]:
+        """各阶段的耗时汇总，按总耗时从大到小排列"""
+        stages = []
+        for (name, labels), histogram in self._histograms.items():
+            if name != "stage_seconds" or not histogram.count:
+                continue
+            stages.append({
+                "labels": dict(labels),
+                "count": histogram.count,
+                "total": histogram.sum,
+                "mean": histogram.sum / histogram.count,
+                "p95": histogram.quantile(0.95),
+                "errors": self._counters.get(("stage_errors_total", labels), 0),
+            })
+        return sorted(stages, key=lambda stage: stage["total"], reverse=True)
+
+    def get_counters(self) -> Dict[str, float]:
+        """除错误计数外的计数器，键为 name{k=v,...}"""
+        return {
+            self._series(name, labels): value
+            for (name, labels), value in sorted(self._counters.items())
+            if name != "stage_errors_total"
+        }
+
+    def render(self) -> str:
+        """导出 Prometheus 文本格式"""
+        lines: List[str] = []
+        typed = set()
+
+        def header(name: str, kind: str, description: Optional[str] = None):
+            if name not in typed:
+                typed.add(name)
+                if description:
+                    lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(self._counters.items()):
+            full = f"{self.prefix}_{name}"
+            header(full, "counter")
+            lines.append(f"{self._series(full, labels)} {value:g}")
+
+        for (name, labels), histogram in sorted(self._histograms.items()):
+            full = f"{self.prefix}_{name}"
+            header(full, "histogram")
+            cumulative = 0
+            for bound, count in zip(BUCKETS, histogram.counts):
+                cumulative += count
+                lines.append(f"{self._series(full + '_bucket', labels + (('le', f'{bound:g}'),))} {cumulative}")
+            lines.append(f"{self._series(full + '_bucket', labels + (('le', '+Inf'),))} {histogram.count}")
+            lines.append(f"{self._series(full + '_sum', labels)} {histogram.sum:.6f}")
+            lines.append(f"{self._series(full + '_count', labels)} {histogram.count}")
+
+        for name, (description, collect) in sorted(self._gauges.items()):
+            full = f"{self.prefix}_{name}"
+            header(full, "gauge", description)
+            for labels, value in collect().items():
+                lines.append(f"{self._series(full, labels)} {value:g}")
+
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _series(name: str, labels: Labels) -> str:
+        if not labels:
+            return name
+        return "%s{%s}" % (name, ",".join(f'{key}="{_escape(value)}"' for key, value in labels))
+
+
+metrics = Metrics()
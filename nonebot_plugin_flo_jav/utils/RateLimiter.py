@@ -0,0 +1,116 @@
+"""
+请求调度 - 按域名的令牌桶限速与并发上限，排队等待而不是丢弃请求，用户查询优先于后台任务
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+# 优先级，数值越小越先被调度
+INTERACTIVE = 0
+BACKGROUND = 1
+
+# 当前上下文发出的请求的优先级；后台任务在自己的上下文中设为 BACKGROUND，其创建的子任务会继承
+request_priority: ContextVar[int] = ContextVar("request_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def background_priority():
+    """在此上下文中发出的请求按后台优先级排队"""
+    token = request_priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        request_priority.reset(token)
+
+
+class TokenBucketScheduler:
+    """单个域名的请求调度器"""
+
+    def __init__(self, rate: float = 0, burst: int = 1, max_in_flight: int = 0):
+        """
+        :param rate: 每秒补充的令牌数，不大于 0 表示不限速
+        :param burst: 令牌桶容量，即允许的突发请求数
+        :param max_in_flight: 同时进行的请求数上限，不大于 0 表示不限制
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_in_flight = max_in_flight
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._in_flight = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def queue_depth(self) -> int:
+        """正在排队的请求数"""
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[int] = None):
+        """占用一个请求名额，退出时归还"""
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, priority: Optional[int] = None):
+        """等待令牌与并发名额；priority 为空时使用当前上下文的优先级"""
+        if priority is None:
+            priority = request_priority.get()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            # 已经分到名额但调用者被取消，归还名额
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        self._in_flight -= 1
+        self._dispatch()
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.rate > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _dispatch(self):
+        self._refill()
+        while self._waiters:
+            _, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if 0 < self.max_in_flight <= self._in_flight:
+                break
+            if self.rate > 0 and self._tokens < 1:
+                self._schedule((1 - self._tokens) / self.rate)
+                break
+            heapq.heappop(self._waiters)
+            if self.rate > 0:
+                self._tokens -= 1
+            self._in_flight += 1
+            future.set_result(None)
+
+    def _schedule(self, delay: float):
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
@@ -0,0 +1,21 @@
+from .SingleFlight import SingleFlight
+from .BackgroundJobs import BackgroundJobs
+from .RateLimiter import TokenBucketScheduler, background_priority, request_priority, INTERACTIVE, BACKGROUND
+from .Metrics import Metrics, metrics
+from .ImageFile import sniff_image_format, is_complete, file_checksum, verify_image
+
+__all__ = [
+    "SingleFlight",
+    "BackgroundJobs",
+    "TokenBucketScheduler",
+    "background_priority",
+    "request_priority",
+    "INTERACTIVE",
+    "BACKGROUND",
+    "Metrics",
+    "metrics",
+    "sniff_image_format",
+    "is_complete",
+    "file_checksum",
+    "verify_image",
+]